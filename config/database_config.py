@@ -1,11 +1,38 @@
 import os
+import sys
+import functools
 from dataclasses import dataclass
 from typing import Optional
-from dotenv import load_dotenv
 
-load_dotenv()
+_dotenv_loaded = False
 
-@dataclass
+# SQLAlchemy URL drivernames keyed by lower-cased driver name
+_URL_DRIVERNAMES = {
+    "sqlite": "sqlite",
+    "postgresql": "postgresql",
+    "mysql": "mysql+pymysql"
+}
+
+# Connection pool defaults, shared with TestConfig so both read DB_POOL_SIZE/DB_POOL_MAX_OVERFLOW the same way
+DEFAULT_POOL_SIZE = 20
+DEFAULT_POOL_MAX_OVERFLOW = 30
+
+# Values accepted as true for boolean environment variables, compared case-insensitively
+_TRUE_VALUES = frozenset({"true", "1", "yes"})
+
+def _parse_bool(value: str) -> bool:
+    """Parse a boolean environment variable value"""
+    return value.strip().lower() in _TRUE_VALUES
+
+def _load_dotenv():
+    """Load variables from a .env file the first time they are needed"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+@dataclass(frozen=True, slots=True)
 class DatabaseConfig:
     """Database configuration settings"""
     host: str = "localhost"
@@ -14,29 +41,60 @@ class DatabaseConfig:
     username: str = "test_user"
     password: str = "test_password"
     driver: str = "sqlite"  # sqlite, postgresql, mysql
+    pool_size: int = DEFAULT_POOL_SIZE
+    pool_max_overflow: int = DEFAULT_POOL_MAX_OVERFLOW
+    pool_recycle: int = 3600  # seconds before a pooled connection is replaced; -1 disables
+    pool_pre_ping: bool = False  # test connections on checkout; only useful for server databases
+    url_override: Optional[str] = None  # full SQLAlchemy URL, e.g. an in-memory SQLite database
     
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def from_env(cls) -> 'DatabaseConfig':
         """Load configuration from environment variables"""
+        _load_dotenv()
+        env = os.environ
         return cls(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", "5432")),
-            database=os.getenv("DB_NAME", "test_db"),
-            username=os.getenv("DB_USER", "test_user"),
-            password=os.getenv("DB_PASSWORD", "test_password"),
-            driver=os.getenv("DB_DRIVER", "sqlite")
+            host=env.get("DB_HOST", "localhost"),
+            port=int(env.get("DB_PORT", "5432")),
+            database=env.get("DB_NAME", "test_db"),
+            username=env.get("DB_USER", "test_user"),
+            password=env.get("DB_PASSWORD", "test_password"),
+            driver=sys.intern(env.get("DB_DRIVER", "sqlite").lower()),
+            pool_size=int(env.get("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            pool_max_overflow=int(env.get("DB_POOL_MAX_OVERFLOW", DEFAULT_POOL_MAX_OVERFLOW)),
+            pool_recycle=int(env.get("DB_POOL_RECYCLE", "3600")),
+            pool_pre_ping=_parse_bool(env.get("DB_POOL_PRE_PING", "false")),
+            url_override=env.get("BDD_DB_URL")
+        )
+    
+    def url(self):
+        """Build the SQLAlchemy URL object for this configuration"""
+        from sqlalchemy.engine import URL, make_url
+        
+        if self.url_override:
+            return make_url(self.url_override)
+        driver = self.driver.lower()
+        drivername = _URL_DRIVERNAMES.get(driver)
+        if drivername is None:
+            raise ValueError(f"Unsupported database driver: {self.driver}")
+        if driver == "sqlite":
+            return URL.create(drivername, database=f"{self.database}.db")
+        return URL.create(
+            drivername,
+            username=self.username,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            database=self.database
         )
     
     def get_connection_string(self) -> str:
         """Generate database connection string based on driver"""
-        if self.driver.lower() == "sqlite":
-            return f"sqlite:///{self.database}.db"
-        elif self.driver.lower() == "postgresql":
-            return f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
-        elif self.driver.lower() == "mysql":
-            return f"mysql+pymysql://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
-        else:
-            raise ValueError(f"Unsupported database driver: {self.driver}")
+        return self.url().render_as_string(hide_password=False)
 
-# Default configuration
-DEFAULT_CONFIG = DatabaseConfig.from_env() 
\ No newline at end of file
+def __getattr__(name):
+    """Build DEFAULT_CONFIG lazily on first access"""
+    if name == "DEFAULT_CONFIG":
+        globals()[name] = DatabaseConfig.from_env()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,10 +3,23 @@ Test configuration settings for the BDD Database Test Suite
 """
 
 import os
-from dataclasses import dataclass
+import sys
+import functools
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
 from typing import Dict, Any
 
-@dataclass
+from config.database_config import DEFAULT_POOL_SIZE, DEFAULT_POOL_MAX_OVERFLOW, _parse_bool
+
+def _parse_driver(value: str) -> str:
+    """Normalize a database driver name"""
+    return sys.intern(value.lower())
+
+# Parsers for environment values, by field name and then by field type
+_FIELD_PARSERS = {"db_driver": _parse_driver}
+_TYPE_PARSERS = {bool: _parse_bool}
+
+@dataclass(frozen=True, slots=True)
 class TestConfig:
     """Test configuration settings"""
     
@@ -26,8 +39,8 @@ class TestConfig:
     timeout_seconds: int = 30
     
     # Database Pool Settings
-    db_pool_size: int = 20
-    db_pool_max_overflow: int = 30
+    db_pool_size: int = DEFAULT_POOL_SIZE
+    db_pool_max_overflow: int = DEFAULT_POOL_MAX_OVERFLOW
     db_pool_timeout: int = 30
     
     # Test Data Settings
@@ -43,38 +56,22 @@ class TestConfig:
     
     # Reporting Settings
     generate_reports: bool = True
-    report_format: str = "html"
+    report_format: str = "pretty"
     report_output_dir: str = "reports"
     
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def from_env(cls) -> 'TestConfig':
         """Load configuration from environment variables"""
-        return cls(
-            db_driver=os.getenv("DB_DRIVER", "sqlite"),
-            db_host=os.getenv("DB_HOST", "localhost"),
-            db_port=int(os.getenv("DB_PORT", "5432")),
-            db_name=os.getenv("DB_NAME", "test_db"),
-            db_user=os.getenv("DB_USER", "test_user"),
-            db_password=os.getenv("DB_PASSWORD", "test_password"),
-            test_env=os.getenv("TEST_ENV", "local"),
-            log_level=os.getenv("LOG_LEVEL", "INFO"),
-            performance_threshold=float(os.getenv("PERFORMANCE_THRESHOLD", "5.0")),
-            max_concurrent_connections=int(os.getenv("MAX_CONCURRENT_CONNECTIONS", "100")),
-            timeout_seconds=int(os.getenv("TIMEOUT_SECONDS", "30")),
-            db_pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
-            db_pool_max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "30")),
-            db_pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
-            load_test_data=os.getenv("LOAD_TEST_DATA", "true").lower() == "true",
-            cleanup_after_tests=os.getenv("CLEANUP_AFTER_TESTS", "true").lower() == "true",
-            preserve_test_data=os.getenv("PRESERVE_TEST_DATA", "false").lower() == "true",
-            bulk_operation_count=int(os.getenv("BULK_OPERATION_COUNT", "1000")),
-            concurrent_operations=int(os.getenv("CONCURRENT_OPERATIONS", "50")),
-            stress_test_users=int(os.getenv("STRESS_TEST_USERS", "100")),
-            stress_test_operations=int(os.getenv("STRESS_TEST_OPERATIONS", "1000")),
-            generate_reports=os.getenv("GENERATE_REPORTS", "true").lower() == "true",
-            report_format=os.getenv("REPORT_FORMAT", "html"),
-            report_output_dir=os.getenv("REPORT_OUTPUT_DIR", "reports")
-        )
+        env = os.environ
+        overrides = {}
+        for config_field in fields(cls):
+            # Every setting is read from the upper-cased field name, e.g. db_port -> DB_PORT
+            raw = env.get(config_field.name.upper())
+            if raw is not None:
+                parser = _FIELD_PARSERS.get(config_field.name) or _TYPE_PARSERS.get(config_field.type, config_field.type)
+                overrides[config_field.name] = parser(raw)
+        return cls(**overrides)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary"""
@@ -115,19 +112,27 @@ class TestConfig:
             }
         }
 
-# Default configuration instance
-TEST_CONFIG = TestConfig.from_env()
+def __getattr__(name):
+    """Build the default TEST_CONFIG instance lazily on first access"""
+    if name == "TEST_CONFIG":
+        globals()[name] = TestConfig.from_env()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Configuration profiles for different environments, expressed as overrides of the defaults
+_BASE_CONFIG = TestConfig()
 
-# Configuration profiles for different environments
-PROFILES = {
-    "local": TestConfig(
+PROFILES = MappingProxyType({
+    "local": replace(
+        _BASE_CONFIG,
         db_driver="sqlite",
         db_name="local_test_db",
         performance_threshold=10.0,
         bulk_operation_count=100,
         concurrent_operations=10
     ),
-    "ci": TestConfig(
+    "ci": replace(
+        _BASE_CONFIG,
         db_driver="sqlite",
         db_name="ci_test_db",
         performance_threshold=15.0,
@@ -135,7 +140,8 @@ PROFILES = {
         concurrent_operations=25,
         cleanup_after_tests=True
     ),
-    "staging": TestConfig(
+    "staging": replace(
+        _BASE_CONFIG,
         db_driver="postgresql",
         db_host="staging-db.example.com",
         db_name="staging_test_db",
@@ -143,7 +149,8 @@ PROFILES = {
         bulk_operation_count=1000,
         concurrent_operations=50
     ),
-    "production": TestConfig(
+    "production": replace(
+        _BASE_CONFIG,
         db_driver="postgresql",
         db_host="prod-db.example.com",
         db_name="prod_test_db",
@@ -152,10 +159,8 @@ PROFILES = {
         concurrent_operations=100,
         preserve_test_data=True
     )
-}
+})
 
 def get_config(profile: str = None) -> TestConfig:
     """Get configuration for specified profile"""
-    if profile and profile in PROFILES:
-        return PROFILES[profile]
-    return TEST_CONFIG 
\ No newline at end of file
+    return PROFILES.get(profile) or TestConfig.from_env() 
\ No newline at end of file
@@ -5,42 +5,131 @@ Handles test setup, teardown, and global configuration
 
 import os
 import sys
+import time
+import sqlite3
+import queue
 import logging
+import logging.handlers
+import concurrent.futures
 from pathlib import Path
+from behave.log_capture import LoggingCapture
+from sqlalchemy.exc import SQLAlchemyError
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from utils.database_utils import init_test_database, cleanup_test_database, insert_test_data, db_manager
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from config.test_config import get_config
+from utils.database_utils import (
+    init_test_database, cleanup_test_database, snapshot_test_data, restore_test_data,
+    db_manager, SAMPLE_TABLES
 )
+
+# During a run the hooks only enqueue log records; a background listener formats and
+# writes them. start_logging()/stop_logging() install and remove this around the run.
+root_logger = logging.getLogger()
+log_listener = None
+log_queue_handler = None
+saved_root_handlers = []
+saved_root_level = logging.NOTSET
 logger = logging.getLogger(__name__)
+steps_logger = logging.getLogger("features.steps")
+
+# Single background worker that reseeds the database between scenarios, so the
+# reset overlaps with teardown/reporting instead of blocking the next scenario;
+# created by before_all and shut down by after_all
+reset_executor = None
+pending_reset = None
+
+# Scenario outcome counters; kept at module level because attributes assigned
+# on context inside scenario hooks are discarded when the scenario layer is popped
+scenarios_passed = 0
+scenarios_failed = 0
+
+def start_reset(reset, *args):
+    """
+    Run reset(*args) on the background worker. A database with a single shared connection
+    cannot serve the worker and the next scenario at once, so there it runs inline.
+    """
+    if not db_manager.is_single_connection():
+        return reset_executor.submit(reset, *args)
+    future = concurrent.futures.Future()
+    try:
+        future.set_result(reset(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def start_logging():
+    """
+    Route root logging through a queue. The listener writes to the handlers that were
+    configured on the root logger, or to stderr if there were none; behave's own log
+    capture is left in place.
+    """
+    global log_listener, log_queue_handler, saved_root_handlers, saved_root_level
+    saved_root_handlers = [
+        handler for handler in root_logger.handlers if not isinstance(handler, LoggingCapture)
+    ]
+    saved_root_level = root_logger.level
+    handlers = saved_root_handlers
+    if not handlers:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(
+            logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        )
+        handlers = [stream_handler]
+    log_queue = queue.Queue(-1)
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_queue_handler = logging.handlers.QueueHandler(log_queue)
+    for handler in saved_root_handlers:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(log_queue_handler)
+    root_logger.setLevel(logging.INFO)
+    log_listener.start()
+
+def stop_logging():
+    """Flush queued log records and give the root logger back its own handlers"""
+    global log_listener, log_queue_handler
+    if log_listener is None:
+        return
+    log_listener.stop()
+    root_logger.removeHandler(log_queue_handler)
+    for handler in saved_root_handlers:
+        root_logger.addHandler(handler)
+    root_logger.setLevel(saved_root_level)
+    log_listener = None
+    log_queue_handler = None
+
+def tables_to_reset(scenario):
+    """
+    Sample tables a scenario modified.
+    Tables written through db_manager are tracked automatically; tag a scenario
+    @needs_<table> to also reset a table it changes by other means.
+    """
+    needed = {tag[len("needs_"):] for tag in scenario.effective_tags if tag.startswith("needs_")}
+    needed.update(db_manager.dirty_tables)
+    return [table_name for table_name in SAMPLE_TABLES if table_name in needed]
 
 def before_all(context):
     """
     Called before all tests run.
     Set up the test environment.
     """
+    global reset_executor, pending_reset
+    start_logging()
     logger.info("Setting up test environment...")
-    
-    # Initialize context attributes
-    context.test_results = {
-        'passed': 0,
-        'failed': 0,
-        'total': 0
-    }
+    reset_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-reset")
     
     # Set up database
     try:
         init_test_database()
+        # Seeding writes through one connection while the rest of the pool opens;
+        # the two are independent, so start the seed first and let them overlap
+        pending_reset = start_reset(snapshot_test_data)
+        db_manager.warm_pool(get_config().db_pool_size)
         logger.info("Test database initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize test database: {str(e)}")
+        logger.error("Failed to initialize test database: %s", e)
         raise
     
     # Global test configuration
@@ -58,12 +147,14 @@ def before_feature(context, feature):
     Called before each feature runs.
     Feature-level setup.
     """
-    logger.info(f"Starting feature: {feature.name}")
-    context.feature_start_time = time.time()
+    logger.info("Starting feature: %s", feature.name)
+    context.feature_start_time = time.perf_counter()
     
     # Feature-specific setup
     if "performance" in feature.name.lower():
         context.performance_mode = True
+        # Keep per-step INFO records out of the timed operations
+        steps_logger.setLevel(logging.WARNING)
         logger.info("Performance testing mode enabled")
     else:
         context.performance_mode = False
@@ -73,67 +164,76 @@ def before_scenario(context, scenario):
     Called before each scenario runs.
     Scenario-level setup.
     """
-    logger.info(f"Starting scenario: {scenario.name}")
-    context.scenario_start_time = time.time()
-    
-    # Reset database state
-    try:
-        # Clean up any existing data
-        db_manager.truncate_table("orders")
-        db_manager.truncate_table("users")
-        db_manager.truncate_table("products")
-        
-        # Insert fresh test data
-        insert_test_data()
-        
-        logger.info("Database reset for scenario")
-    except Exception as e:
-        logger.error(f"Failed to reset database: {str(e)}")
-        raise
+    logger.info("Starting scenario: %s", scenario.name)
+    context.scenario_start_time = time.perf_counter()
     
-    # Initialize scenario context
+    # Initialize scenario context up front so later hooks can read it unconditionally
     context.scenario_errors = []
     context.scenario_warnings = []
     context.operation_results = []
+    context.transaction_session = None
+    
+    # Wait for the reset queued by before_all/after_scenario to finish, then
+    # start tracking the tables this scenario writes. A failed reset is reported
+    # once and replaced by a full synchronous one, so later scenarios start clean.
+    global pending_reset
+    reset, pending_reset = pending_reset, None
+    try:
+        if reset is not None:
+            reset.result()
+            logger.info("Database reset for scenario")
+    except Exception as e:
+        logger.error("Background database reset failed, resetting all sample tables: %s", e)
+        try:
+            restore_test_data()
+        except Exception as e:
+            logger.error("Failed to reset database: %s", e)
+            raise
+    db_manager.dirty_tables.clear()
+    db_manager.known_empty_tables.clear()
 
 def after_scenario(context, scenario):
     """
     Called after each scenario runs.
     Scenario-level teardown.
     """
-    scenario_duration = time.time() - context.scenario_start_time
+    global pending_reset, scenarios_passed, scenarios_failed
+    scenario_duration = time.perf_counter() - context.scenario_start_time
     
     if scenario.status == "passed":
-        context.test_results['passed'] += 1
-        logger.info(f"Scenario PASSED: {scenario.name} (Duration: {scenario_duration:.2f}s)")
+        scenarios_passed += 1
+        logger.info("Scenario PASSED: %s (Duration: %.2fs)", scenario.name, scenario_duration)
     else:
-        context.test_results['failed'] += 1
-        logger.error(f"Scenario FAILED: {scenario.name} (Duration: {scenario_duration:.2f}s)")
+        scenarios_failed += 1
+        logger.error("Scenario FAILED: %s (Duration: %.2fs)", scenario.name, scenario_duration)
         
         # Log any captured errors
-        if hasattr(context, 'scenario_errors') and context.scenario_errors:
+        if context.scenario_errors:
             for error in context.scenario_errors:
-                logger.error(f"Scenario error: {error}")
-    
-    context.test_results['total'] += 1
+                logger.error("Scenario error: %s", error)
     
     # Clean up scenario-specific resources
     try:
-        if hasattr(context, 'transaction_session'):
+        if context.transaction_session is not None:
             context.transaction_session.close()
     except Exception as e:
-        logger.error(f"Error during scenario cleanup: {str(e)}")
+        logger.error("Error during scenario cleanup: %s", e)
+    
+    # Start resetting the tables this scenario changed in the background
+    tables = tables_to_reset(scenario)
+    pending_reset = start_reset(restore_test_data, tables) if tables else None
 
 def after_feature(context, feature):
     """
     Called after each feature runs.
     Feature-level teardown.
     """
-    feature_duration = time.time() - context.feature_start_time
-    logger.info(f"Feature completed: {feature.name} (Duration: {feature_duration:.2f}s)")
+    feature_duration = time.perf_counter() - context.feature_start_time
+    logger.info("Feature completed: %s (Duration: %.2fs)", feature.name, feature_duration)
     
     # Feature-specific cleanup
-    if hasattr(context, 'performance_mode') and context.performance_mode:
+    if context.performance_mode:
+        steps_logger.setLevel(logging.NOTSET)
         logger.info("Performance testing mode disabled")
 
 def after_all(context):
@@ -141,28 +241,37 @@ def after_all(context):
     Called after all tests run.
     Global teardown.
     """
+    global reset_executor
     logger.info("Tearing down test environment...")
     
     # Print test summary
-    total = context.test_results['total']
-    passed = context.test_results['passed']
-    failed = context.test_results['failed']
+    passed = scenarios_passed
+    failed = scenarios_failed
+    total = passed + failed
     
-    logger.info(f"Test Summary: {passed}/{total} passed, {failed} failed")
+    logger.info("Test Summary: %d/%d passed, %d failed", passed, total, failed)
     
     if failed > 0:
-        logger.warning(f"{failed} test(s) failed!")
+        logger.warning("%d test(s) failed!", failed)
     else:
         logger.info("All tests passed!")
     
-    # Clean up database
+    # Clean up database once the last background reset has finished
+    try:
+        if pending_reset is not None:
+            pending_reset.result()
+    except Exception as e:
+        logger.error("Final database reset failed: %s", e)
+    reset_executor.shutdown(wait=True)
+    reset_executor = None
     try:
         cleanup_test_database()
         logger.info("Test database cleaned up successfully")
     except Exception as e:
-        logger.error(f"Error during database cleanup: {str(e)}")
+        logger.error("Error during database cleanup: %s", e)
     
     logger.info("Test environment teardown complete")
+    stop_logging()
 
 # Hook for capturing step failures
 def after_step(context, step):
@@ -171,17 +280,16 @@ def after_step(context, step):
     Capture step failures for debugging.
     """
     if step.status == "failed":
-        if hasattr(context, 'scenario_errors'):
-            context.scenario_errors.append(f"Step failed: {step.name}")
+        context.scenario_errors.append(f"Step failed: {step.name}")
         
-        # Log the exception if available
-        if hasattr(step, 'exception'):
-            logger.error(f"Step exception: {step.exception}")
+        # Log the exception if available; database errors propagate from DatabaseManager
+        # unchanged, so this is the one place they are reported
+        if isinstance(getattr(step, 'exception', None), (SQLAlchemyError, sqlite3.Error)):
+            logger.error("Database error in step '%s': %s", step.name, step.exception)
+        elif hasattr(step, 'exception'):
+            logger.error("Step exception: %s", step.exception)
 
 # Custom formatters can be added here
 def format_step_name(step):
     """Format step name for logging"""
-    return f"{step.keyword} {step.name}"
-
-# Add time import that was missing
-import time 
\ No newline at end of file
+    return f"{step.keyword} {step.name}" 
\ No newline at end of file
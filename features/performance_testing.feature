@@ -29,6 +29,13 @@ Feature: Database Performance Testing
     And no deadlocks should occur
     And the total time should be less than 30 seconds
 
+  Scenario: Concurrent writes under lock contention
+    Given the database is connected
+    And another connection holds the write lock for 300 milliseconds
+    When I perform 10 concurrent write operations
+    Then all concurrent writes should succeed
+    And the writes should have waited for the lock
+
   Scenario: Database connection pool performance
     Given the database connection pool is configured
     When I request 100 database connections simultaneously
@@ -2,13 +2,17 @@ import time
 import threading
 from typing import Dict, Any, List
 from behave import given, when, then, step
-from faker import Faker
+from sqlalchemy import func, insert, text
+from sqlalchemy.exc import OperationalError
 import traceback
 import logging
 import sqlite3
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 import concurrent.futures
+import functools
+import itertools
+import numbers
 import sys
 import os
 
@@ -16,17 +20,243 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from utils.database_utils import (
-    db_manager, init_test_database, cleanup_test_database, 
-    insert_test_data, User, Product, Order
+    db_manager, init_test_database, reset_test_data, User, Product, Order, SAMPLE_TABLES
 )
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Global variables for context sharing
-context_data = {}
-fake = Faker()
+# Root logging is configured by the environment hooks. Behave executes step files
+# without a module __name__, so the logger is named explicitly; the hooks quiet
+# it during performance features.
+logger = logging.getLogger("features.steps.database_steps")
+
+# Process-wide counter so repeated bulk and concurrent inserts never reuse a username or email
+bulk_user_sequence = itertools.count()
+
+# Statements reused across calls so SQLAlchemy's compiled cache is hit every time
+COUNT_USERS_QUERY = text("SELECT COUNT(*) AS count FROM users")
+COUNT_PRODUCTS_QUERY = text("SELECT COUNT(*) AS count FROM products")
+USER_BY_USERNAME_QUERY = text("SELECT * FROM users WHERE username = :username")
+PRODUCT_BY_NAME_QUERY = text("SELECT * FROM products WHERE name = :name")
+UPDATE_USER_EMAIL_QUERY = text("UPDATE users SET email = :email WHERE username = :username")
+DELETE_USER_QUERY = text("DELETE FROM users WHERE username = :username")
+USERS_BY_DOMAIN_QUERY = text("SELECT * FROM users WHERE email_domain = :domain")
+INSERT_USER_QUERY = text("""
+    INSERT INTO users (username, email, created_at, is_active)
+    VALUES (:username, :email, :created_at, :is_active)
+""")
+INSERT_ORDER_QUERY = text("""
+    INSERT INTO orders (user_id, product_id, quantity, total_amount, order_date, status)
+    VALUES (:user_id, :product_id, :quantity, :total_amount, :order_date, :status)
+""")
+# Most recent order of a user plus their order count from the trigger-maintained
+# user_order_stats table; ix_orders_user_date yields the newest order first
+LATEST_ORDER_QUERY = text("""
+    SELECT o.*, p.name as product_name, u.username, s.order_count
+    FROM users u
+    JOIN user_order_stats s ON s.user_id = u.id
+    JOIN orders o ON o.user_id = u.id
+    JOIN products p ON o.product_id = p.id
+    WHERE u.username = :username
+    ORDER BY o.order_date DESC
+    LIMIT 1
+""")
+# Without the stats triggers (non-SQLite backends) the count comes from orders itself
+LATEST_ORDER_AGGREGATE_QUERY = text("""
+    SELECT o.*, p.name as product_name, u.username,
+        (SELECT COUNT(*) FROM orders c WHERE c.user_id = u.id) as order_count
+    FROM users u
+    JOIN orders o ON o.user_id = u.id
+    JOIN products p ON o.product_id = p.id
+    WHERE u.username = :username
+    ORDER BY o.order_date DESC
+    LIMIT 1
+""")
+# Totals come from the trigger-maintained user_order_stats table instead of aggregating orders
+USER_ORDER_STATS_QUERY = text("""
+    SELECT 
+        u.username,
+        u.email,
+        COALESCE(s.order_count, 0) as order_count,
+        s.total_spent,
+        s.avg_order_value
+    FROM users u
+    LEFT JOIN user_order_stats s ON u.id = s.user_id
+    ORDER BY s.total_spent DESC
+""")
+# The stats triggers are SQLite-only, so other backends aggregate orders directly
+USER_ORDER_STATS_AGGREGATE_QUERY = text("""
+    SELECT 
+        u.username,
+        u.email,
+        COUNT(o.id) as order_count,
+        SUM(o.total_amount) as total_spent,
+        AVG(o.total_amount) as avg_order_value
+    FROM users u
+    LEFT JOIN orders o ON u.id = o.user_id
+    GROUP BY u.id, u.username, u.email
+    ORDER BY total_spent DESC
+""")
+USER_HAS_ORDERS_QUERY = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM orders o
+        JOIN users u ON o.user_id = u.id
+        WHERE u.username = :username
+    ) AS has_orders
+""")
+
+# Columns that are the same for every bulk row are filled in by the database, so
+# each executemany parameter set only carries the two generated strings
+BULK_USER_INSERT = insert(User.__table__).values(created_at=func.current_timestamp(), is_active=1)
+BULK_PRODUCT_INSERT = insert(Product.__table__).values(created_at=func.current_timestamp())
+SEED_PRODUCT_CATEGORIES = ("Electronics", "Books", "Home")
+
+# Top a table up to :count rows in one statement: base counts the missing rows once,
+# and seed suffixes continue from the highest id so they line up with the ids the database assigns.
+# The WITH ... INSERT form and || concatenation are only portable to SQLite and PostgreSQL.
+SEED_QUERY_DIALECTS = {"sqlite", "postgresql"}
+SEED_USERS_QUERY = text("""
+    WITH RECURSIVE base(needed, max_id) AS (
+        SELECT :count - COUNT(*), COALESCE(MAX(id), 0) FROM users
+    ),
+    seq(n) AS (
+        SELECT 1 FROM base WHERE needed > 0
+        UNION ALL
+        SELECT n + 1 FROM seq, base WHERE n < base.needed
+    )
+    INSERT INTO users (username, email, created_at, is_active)
+    SELECT 'seed_user_' || (base.max_id + n), 'seed_user_' || (base.max_id + n) || '@example.com', CURRENT_TIMESTAMP, 1
+    FROM seq, base
+""")
+SEED_PRODUCTS_QUERY = text("""
+    WITH RECURSIVE base(needed, max_id) AS (
+        SELECT :count - COUNT(*), COALESCE(MAX(id), 0) FROM products
+    ),
+    seq(n) AS (
+        SELECT 1 FROM base WHERE needed > 0
+        UNION ALL
+        SELECT n + 1 FROM seq, base WHERE n < base.needed
+    )
+    INSERT INTO products (name, price, category, in_stock, created_at)
+    SELECT 'seed_product_' || (base.max_id + n),
+           (base.max_id + n) % 1000,
+           CASE (base.max_id + n) % 3 WHEN 0 THEN 'Electronics' WHEN 1 THEN 'Books' ELSE 'Home' END,
+           (base.max_id + n) % 100,
+           CURRENT_TIMESTAMP
+    FROM seq, base
+""")
+# Other dialects read the same base row once and generate the missing rows in Python
+SEED_BASE_QUERY = "SELECT COUNT(*) AS row_count, COALESCE(MAX(id), 0) AS max_id FROM {table_name}"
+
+
+# Lock errors that outlast the busy timeout, or bypass it (shared-cache in-memory
+# databases report SQLITE_LOCKED at once), are retried with exponential backoff
+WRITE_RETRY_ATTEMPTS = 8
+WRITE_RETRY_DELAY = 0.01
+
+def with_write_retry(operation):
+    """Run a write transaction, retrying it with exponential backoff while the database is locked"""
+    for attempt in range(WRITE_RETRY_ATTEMPTS):
+        try:
+            return operation()
+        except OperationalError as e:
+            if "locked" not in str(e) or attempt == WRITE_RETRY_ATTEMPTS - 1:
+                raise
+            time.sleep(WRITE_RETRY_DELAY * 2 ** attempt)
+
+# Statements that take the write lock on users for the rest of a transaction, by dialect
+WRITE_LOCK_STATEMENTS = {
+    "sqlite": "DELETE FROM users WHERE 0",
+    "postgresql": "LOCK TABLE users IN EXCLUSIVE MODE"
+}
+
+def run_concurrently(operation, items, max_workers):
+    """
+    Run operation over items on a thread pool and return the results in item order.
+    The first failure cancels the operations that have not started yet and is re-raised.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(operation, item) for item in items]
+        done, not_done = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+        failed = next((future for future in done if future.exception() is not None), None)
+        if failed is not None:
+            for future in not_done:
+                future.cancel()
+            raise failed.exception()
+        return [future.result() for future in futures]
+
+def concurrent_worker_count(requested):
+    """Cap worker threads at the connection pool capacity; extra threads would only queue for a connection"""
+    if db_manager.is_single_connection():
+        return 1
+    capacity = db_manager.config.pool_size + db_manager.config.pool_max_overflow
+    return max(1, min(requested, capacity))
+
+
+def seed_in_database():
+    """Whether the ensure-count steps can generate their rows with the SEED_* queries"""
+    return db_manager.engine.dialect.name in SEED_QUERY_DIALECTS
+
+def missing_seed_ids(table_name, count):
+    """Return the ids that topping table_name up to count rows would assign"""
+    row = db_manager.execute_query(SEED_BASE_QUERY.format(table_name=table_name))[0]
+    return range(row["max_id"] + 1, row["max_id"] + 1 + count - row["row_count"])
+
+def order_stats_maintained():
+    """Whether user_order_stats is kept current by triggers; they are only installed on SQLite"""
+    return db_manager.engine.dialect.name == "sqlite"
+
+# Seed data lookups always hit the database, since steps write to these tables
+# between lookups. Schema lookups are cached by db_manager.
+def find_user(username):
+    """Return the user rows matching username as a tuple"""
+    return tuple(db_manager.execute_query(
+        USER_BY_USERNAME_QUERY,
+        {"username": username}
+    ))
+
+def find_product(product_name):
+    """Return the product rows matching product_name as a tuple"""
+    return tuple(db_manager.execute_query(
+        PRODUCT_BY_NAME_QUERY,
+        {"name": product_name}
+    ))
+
+def count_products():
+    """Return the number of products in the inventory"""
+    return db_manager.scalar(COUNT_PRODUCTS_QUERY)
+
+def table_schema(table_name):
+    """
+    Return the PRAGMA table_info rows for table_name as a tuple, from db_manager's schema cache.
+    A missing table has no columns, so one lookup also answers existence.
+    """
+    return tuple(db_manager.get_table_schema(table_name))
+
+# The DDL assertions that follow a CREATE TABLE all read table_schema, so it is
+# warmed on a worker thread while Behave moves on to the next step.
+schema_prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="schema-prefetch"
+)
+pending_prefetch = None
+
+def prefetch_table(table_name):
+    """Start loading table_schema(table_name) in the background"""
+    global pending_prefetch
+    if db_manager.is_single_connection():
+        # The worker would share the one connection with the next step
+        table_schema(table_name)
+        return
+    pending_prefetch = schema_prefetch_executor.submit(table_schema, table_name)
+
+def wait_for_prefetch():
+    """Let an in-flight prefetch finish so it cannot repopulate a cache that is being cleared"""
+    if pending_prefetch is not None:
+        concurrent.futures.wait([pending_prefetch])
+
+def forget_table(table_name):
+    """Invalidate cached existence and schema after DDL on table_name"""
+    wait_for_prefetch()
+    db_manager.known_empty_tables.discard(table_name.lower())
+    db_manager.invalidate_schema_cache()
 
 # Background Steps
 @given('the database is initialized')
@@ -37,7 +267,7 @@ def step_initialize_database(context):
         context.database_initialized = True
         logger.info("Database initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}")
+        logger.error("Failed to initialize database: %s", e)
         context.database_initialized = False
         raise
 
@@ -45,11 +275,19 @@ def step_initialize_database(context):
 def step_load_test_data(context):
     """Load test data into the database"""
     try:
-        insert_test_data()
+        # The hooks seed once and restore between scenarios, so the sample rows are
+        # normally resident already; only reseed tables that came up empty. A table
+        # truncated with no write since is empty without querying it
+        empty_tables = [
+            table_name for table_name in SAMPLE_TABLES
+            if db_manager.is_known_empty(table_name) or db_manager.is_empty(table_name)
+        ]
+        if empty_tables:
+            reset_test_data(empty_tables)
         context.test_data_loaded = True
         logger.info("Test data loaded successfully")
     except Exception as e:
-        logger.error(f"Failed to load test data: {str(e)}")
+        logger.error("Failed to load test data: %s", e)
         context.test_data_loaded = False
         raise
 
@@ -97,9 +335,7 @@ def step_verify_connection_established(context):
 def step_verify_database_accessible(context):
     """Verify database is accessible"""
     try:
-        result = db_manager.execute_query("SELECT 1 as test")
-        assert result is not None, "Database is not accessible"
-        assert len(result) > 0, "Database query returned no results"
+        assert db_manager.ping(), "Database query returned no results"
     except Exception as e:
         raise AssertionError(f"Database is not accessible: {str(e)}")
 
@@ -108,12 +344,9 @@ def step_verify_database_accessible(context):
 def step_user_exists(context, username):
     """Verify user exists with given username"""
     try:
-        result = db_manager.execute_query(
-            "SELECT * FROM users WHERE username = :username",
-            {"username": username}
-        )
+        result = find_user(username)
         assert len(result) > 0, f"User {username} not found"
-        context.current_user = result[0]
+        context.current_user = dict(result[0])
     except Exception as e:
         raise AssertionError(f"Error checking user existence: {str(e)}")
 
@@ -121,17 +354,13 @@ def step_user_exists(context, username):
 def step_create_user(context, username, email):
     """Create a new user"""
     try:
-        query = """
-            INSERT INTO users (username, email, created_at, is_active)
-            VALUES (:username, :email, :created_at, :is_active)
-        """
         params = {
             "username": username,
             "email": email,
             "created_at": datetime.utcnow(),
             "is_active": 1
         }
-        result = db_manager.execute_non_query(query, params)
+        result = db_manager.execute_non_query(INSERT_USER_QUERY, params)
         context.operation_result = result
         context.last_created_user = {"username": username, "email": email}
     except Exception as e:
@@ -143,7 +372,7 @@ def step_retrieve_user(context, username):
     """Retrieve user by username"""
     try:
         result = db_manager.execute_query(
-            "SELECT * FROM users WHERE username = :username",
+            USER_BY_USERNAME_QUERY,
             {"username": username}
         )
         context.retrieved_user = result[0] if result else None
@@ -155,15 +384,11 @@ def step_retrieve_user(context, username):
 def step_update_user_email(context, new_email):
     """Update user email"""
     try:
-        query = """
-            UPDATE users SET email = :email 
-            WHERE username = :username
-        """
         params = {
             "email": new_email,
             "username": context.current_user["username"]
         }
-        result = db_manager.execute_non_query(query, params)
+        result = db_manager.execute_non_query(UPDATE_USER_EMAIL_QUERY, params)
         context.operation_result = result
         context.updated_email = new_email
     except Exception as e:
@@ -174,8 +399,7 @@ def step_update_user_email(context, new_email):
 def step_delete_user(context, username):
     """Delete user by username"""
     try:
-        query = "DELETE FROM users WHERE username = :username"
-        result = db_manager.execute_non_query(query, {"username": username})
+        result = db_manager.execute_non_query(DELETE_USER_QUERY, {"username": username})
         context.operation_result = result
         context.deleted_username = username
     except Exception as e:
@@ -186,17 +410,13 @@ def step_delete_user(context, username):
 def step_create_duplicate_user(context, username):
     """Try to create user with duplicate username"""
     try:
-        query = """
-            INSERT INTO users (username, email, created_at, is_active)
-            VALUES (:username, :email, :created_at, :is_active)
-        """
         params = {
             "username": username,
             "email": "duplicate@example.com",
             "created_at": datetime.utcnow(),
             "is_active": 1
         }
-        result = db_manager.execute_non_query(query, params)
+        result = db_manager.execute_non_query(INSERT_USER_QUERY, params)
         context.operation_result = result
     except Exception as e:
         context.operation_error = str(e)
@@ -207,8 +427,7 @@ def step_create_duplicate_user(context, username):
 def step_products_exist(context):
     """Verify products exist in inventory"""
     try:
-        result = db_manager.execute_query("SELECT COUNT(*) as count FROM products")
-        assert result[0]["count"] > 0, "No products found in inventory"
+        assert count_products() > 0, "No products found in inventory"
         context.products_exist = True
     except Exception as e:
         raise AssertionError(f"Error checking products: {str(e)}")
@@ -217,12 +436,9 @@ def step_products_exist(context):
 def step_product_exists(context, product_name):
     """Verify product exists with given name"""
     try:
-        result = db_manager.execute_query(
-            "SELECT * FROM products WHERE name = :name",
-            {"name": product_name}
-        )
+        result = find_product(product_name)
         assert len(result) > 0, f"Product {product_name} not found"
-        context.current_product = result[0]
+        context.current_product = dict(result[0])
     except Exception as e:
         raise AssertionError(f"Error checking product existence: {str(e)}")
 
@@ -231,7 +447,7 @@ def step_check_inventory(context, product_name):
     """Check inventory for specific product"""
     try:
         result = db_manager.execute_query(
-            "SELECT * FROM products WHERE name = :name",
+            PRODUCT_BY_NAME_QUERY,
             {"name": product_name}
         )
         context.inventory_check = result[0] if result else None
@@ -244,12 +460,8 @@ def step_check_inventory(context, product_name):
 def step_orders_exist_for_user(context, username):
     """Verify orders exist for given user"""
     try:
-        result = db_manager.execute_query("""
-            SELECT COUNT(*) as count FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE u.username = :username
-        """, {"username": username})
-        assert result[0]["count"] > 0, f"No orders found for user {username}"
+        result = db_manager.execute_query(USER_HAS_ORDERS_QUERY, {"username": username})
+        assert result[0]["has_orders"], f"No orders found for user {username}"
         context.orders_exist = True
     except Exception as e:
         raise AssertionError(f"Error checking orders: {str(e)}")
@@ -261,13 +473,10 @@ def step_place_order(context, quantity, product_name):
         # Get user and product IDs
         user_id = context.current_user["id"]
         product_id = context.current_product["id"]
-        unit_price = context.current_product["price"]
-        total_amount = quantity * unit_price
+        # Prices are stored as REAL; do the arithmetic in whole cents so totals are exact
+        total_cents = quantity * round(context.current_product["price"] * 100)
+        total_amount = total_cents / 100
         
-        query = """
-            INSERT INTO orders (user_id, product_id, quantity, total_amount, order_date, status)
-            VALUES (:user_id, :product_id, :quantity, :total_amount, :order_date, :status)
-        """
         params = {
             "user_id": user_id,
             "product_id": product_id,
@@ -276,9 +485,9 @@ def step_place_order(context, quantity, product_name):
             "order_date": datetime.utcnow(),
             "status": "pending"
         }
-        result = db_manager.execute_non_query(query, params)
+        result = db_manager.execute_non_query(INSERT_ORDER_QUERY, params)
         context.operation_result = result
-        context.order_total = total_amount
+        context.order_total_cents = total_cents
     except Exception as e:
         context.operation_error = str(e)
         context.operation_result = 0
@@ -287,18 +496,15 @@ def step_place_order(context, quantity, product_name):
 def step_retrieve_order_history(context, username):
     """Retrieve order history for user"""
     try:
-        result = db_manager.execute_query("""
-            SELECT o.*, p.name as product_name, u.username
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN products p ON o.product_id = p.id
-            WHERE u.username = :username
-            ORDER BY o.order_date DESC
-        """, {"username": username})
-        context.order_history = result
+        # The verifiers only need the count and a sample row, so fetch just the latest order
+        query = LATEST_ORDER_QUERY if order_stats_maintained() else LATEST_ORDER_AGGREGATE_QUERY
+        result = db_manager.execute_query(query, {"username": username})
+        context.first_order = result[0] if result else None
+        context.order_count = result[0]["order_count"] if result else 0
     except Exception as e:
         context.operation_error = str(e)
-        context.order_history = []
+        context.order_count = 0
+        context.first_order = None
 
 # Database Operations Steps
 @when('I perform a "{operation}" on table "{table_name}"')
@@ -306,11 +512,9 @@ def step_perform_table_operation(context, operation, table_name):
     """Perform various operations on database tables"""
     try:
         if operation == "count":
-            result = db_manager.execute_query(f"SELECT COUNT(*) as count FROM {table_name}")
-            context.operation_result = result[0]["count"]
+            context.operation_result = db_manager.get_table_count(table_name)
         elif operation == "schema":
-            result = db_manager.get_table_schema(table_name)
-            context.operation_result = len(result)
+            context.operation_result = len(table_schema(table_name))
         elif operation == "truncate":
             result = db_manager.truncate_table(table_name)
             context.operation_result = result
@@ -327,12 +531,12 @@ def step_perform_table_operation(context, operation, table_name):
 def step_start_transaction(context):
     """Start a database transaction"""
     context.transaction_started = True
-    context.transaction_session = db_manager.session_factory()
+    context.transaction_session = db_manager.scoped_session()
 
 @when('I rollback the transaction')
 def step_rollback_transaction(context):
     """Rollback the current transaction"""
-    if hasattr(context, 'transaction_session'):
+    if context.transaction_session is not None:
         context.transaction_session.rollback()
         context.transaction_session.close()
         context.transaction_rolled_back = True
@@ -342,23 +546,12 @@ def step_rollback_transaction(context):
 def step_execute_complex_query(context):
     """Execute complex query for user order statistics"""
     try:
-        query = """
-            SELECT 
-                u.username,
-                u.email,
-                COUNT(o.id) as order_count,
-                SUM(o.total_amount) as total_spent,
-                AVG(o.total_amount) as avg_order_value
-            FROM users u
-            LEFT JOIN orders o ON u.id = o.user_id
-            GROUP BY u.id, u.username, u.email
-            ORDER BY total_spent DESC
-        """
-        result = db_manager.execute_query(query)
-        context.complex_query_result = result
+        # Kept column-wise: the verifiers only check column names and value types
+        query = USER_ORDER_STATS_QUERY if order_stats_maintained() else USER_ORDER_STATS_AGGREGATE_QUERY
+        context.complex_query_result = db_manager.execute_query_columns(query)
     except Exception as e:
         context.operation_error = str(e)
-        context.complex_query_result = []
+        context.complex_query_result = {}
 
 # Performance Testing Steps
 @when('I create {count:d} users in bulk')
@@ -366,23 +559,14 @@ def step_create_bulk_users(context, count):
     """Create multiple users in bulk"""
     start_time = time.time()
     try:
-        users = []
-        for i in range(count):
-            users.append({
-                "username": fake.user_name() + str(i),
-                "email": fake.email(),
-                "created_at": datetime.utcnow(),
-                "is_active": 1
-            })
+        # Synthetic rows only need to be unique, so number them
+        users = [
+            {"username": f"bulk_user_{n:08d}", "email": f"bulk_user_{n}@example.com"}
+            for n in itertools.islice(bulk_user_sequence, count)
+        ]
         
-        query = """
-            INSERT INTO users (username, email, created_at, is_active)
-            VALUES (:username, :email, :created_at, :is_active)
-        """
-        
-        with db_manager.get_session() as session:
-            for user in users:
-                session.execute(query, user)
+        # Core insert goes straight to the driver's executemany, bypassing ORM bulk persistence
+        db_manager.execute_many(BULK_USER_INSERT, users)
         
         context.bulk_operation_time = time.time() - start_time
         context.bulk_operation_count = count
@@ -394,44 +578,43 @@ def step_create_bulk_users(context, count):
 @given('there are {count:d} users in the database')
 def step_ensure_user_count(context, count):
     """Ensure there are specified number of users in database"""
-    current_count = db_manager.get_table_count("users")
-    if current_count < count:
-        needed = count - current_count
-        step_create_bulk_users(context, needed)
+    if seed_in_database():
+        # Count and generate the missing rows inside the database in a single statement
+        db_manager.execute_non_query(SEED_USERS_QUERY, {"count": count})
+        return
+    users = [
+        {"username": f"seed_user_{n}", "email": f"seed_user_{n}@example.com"}
+        for n in missing_seed_ids("users", count)
+    ]
+    if users:
+        db_manager.execute_many(BULK_USER_INSERT, users)
 
 @given('there are {count:d} products in the database')
 def step_ensure_product_count(context, count):
     """Ensure there are specified number of products in database"""
-    current_count = db_manager.get_table_count("products")
-    if current_count < count:
-        needed = count - current_count
-        # Create bulk products
-        products = []
-        for i in range(needed):
-            products.append({
-                "name": fake.word() + str(i),
-                "price": fake.random_number(digits=3),
-                "category": fake.word(),
-                "in_stock": fake.random_number(digits=2),
-                "created_at": datetime.utcnow()
-            })
-        
-        query = """
-            INSERT INTO products (name, price, category, in_stock, created_at)
-            VALUES (:name, :price, :category, :in_stock, :created_at)
-        """
-        
-        with db_manager.get_session() as session:
-            for product in products:
-                session.execute(query, product)
+    if seed_in_database():
+        # Count and generate the missing rows inside the database in a single statement
+        db_manager.execute_non_query(SEED_PRODUCTS_QUERY, {"count": count})
+        return
+    # Same values SEED_PRODUCTS_QUERY derives from each id
+    products = [
+        {
+            "name": f"seed_product_{n}",
+            "price": n % 1000,
+            "category": SEED_PRODUCT_CATEGORIES[n % 3],
+            "in_stock": n % 100
+        }
+        for n in missing_seed_ids("products", count)
+    ]
+    if products:
+        db_manager.execute_many(BULK_PRODUCT_INSERT, products)
 
 @when('I search for users with email domain "{domain}"')
 def step_search_users_by_domain(context, domain):
     """Search for users with specific email domain"""
     start_time = time.time()
     try:
-        query = "SELECT * FROM users WHERE email LIKE :domain"
-        result = db_manager.execute_query(query, {"domain": f"%{domain}%"})
+        result = db_manager.execute_query(USERS_BY_DOMAIN_QUERY, {"domain": domain})
         context.search_result = result
         context.search_time = time.time() - start_time
         context.search_success = True
@@ -442,13 +625,15 @@ def step_search_users_by_domain(context, domain):
 @when('I perform {read_count:d} concurrent read operations')
 def step_concurrent_read_operations(context, read_count):
     """Perform concurrent read operations"""
-    def read_operation():
-        return db_manager.execute_query("SELECT COUNT(*) as count FROM users")
+    def read_operations(count):
+        # Each worker checks out one pooled connection and runs its whole share of reads on it
+        with db_manager.engine.connect() as connection:
+            return [connection.execute(COUNT_USERS_QUERY).scalar() for _ in range(count)]
     
+    worker_count = concurrent_worker_count(read_count)
+    shares = [len(range(worker, read_count, worker_count)) for worker in range(worker_count)]
     start_time = time.time()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=read_count) as executor:
-        futures = [executor.submit(read_operation) for _ in range(read_count)]
-        results = [future.result() for future in concurrent.futures.as_completed(futures)]
+    results = list(itertools.chain.from_iterable(run_concurrently(read_operations, shares, worker_count)))
     
     context.concurrent_read_time = time.time() - start_time
     context.concurrent_read_results = results
@@ -457,27 +642,32 @@ def step_concurrent_read_operations(context, read_count):
 @when('I perform {write_count:d} concurrent write operations')
 def step_concurrent_write_operations(context, write_count):
     """Perform concurrent write operations"""
-    def write_operation(index):
-        query = """
-            INSERT INTO users (username, email, created_at, is_active)
-            VALUES (:username, :email, :created_at, :is_active)
-        """
-        params = {
-            "username": f"concurrent_user_{index}_{fake.random_number()}",
-            "email": fake.email(),
-            "created_at": datetime.utcnow(),
-            "is_active": 1
-        }
-        return db_manager.execute_non_query(query, params)
+    def insert_shard(shard):
+        with db_manager.engine.begin() as connection:
+            return connection.execute(BULK_USER_INSERT, shard).rowcount
+    
+    def write_operations(shard):
+        # Workers contend for SQLite's single write lock; the connection's busy timeout
+        # makes each one wait for it, with with_write_retry as the bounded fallback.
+        # Each worker inserts its whole shard with one executemany and one commit.
+        return with_write_retry(lambda: insert_shard(shard))
     
+    # Build every row up front from the shared counter; like bulk creation, the
+    # constant created_at/is_active columns are filled in by the database
+    rows = [
+        {"username": f"concurrent_user_{n:08d}", "email": f"concurrent_user_{n}@example.com"}
+        for n in itertools.islice(bulk_user_sequence, write_count)
+    ]
+    
+    worker_count = concurrent_worker_count(write_count)
+    shards = [shard for shard in (rows[worker::worker_count] for worker in range(worker_count)) if shard]
     start_time = time.time()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=write_count) as executor:
-        futures = [executor.submit(write_operation, i) for i in range(write_count)]
-        results = [future.result() for future in concurrent.futures.as_completed(futures)]
+    results = run_concurrently(write_operations, shards, worker_count)
     
     context.concurrent_write_time = time.time() - start_time
+    context.concurrent_write_finished_at = start_time + context.concurrent_write_time
     context.concurrent_write_results = results
-    context.concurrent_write_success = len(results) == write_count
+    context.concurrent_write_success = sum(results) == write_count
 
 # Assertion Steps
 @then('the user should be created successfully')
@@ -500,7 +690,7 @@ def step_verify_user_email(context, expected_email):
     else:
         # Check updated email
         user = db_manager.execute_query(
-            "SELECT * FROM users WHERE username = :username",
+            USER_BY_USERNAME_QUERY,
             {"username": context.current_user["username"]}
         )[0]
         assert user["email"] == expected_email, \
@@ -519,7 +709,7 @@ def step_verify_user_deleted(context):
     
     # Verify user no longer exists
     result = db_manager.execute_query(
-        "SELECT * FROM users WHERE username = :username",
+        USER_BY_USERNAME_QUERY,
         {"username": context.deleted_username}
     )
     assert len(result) == 0, "User still exists after deletion"
@@ -565,21 +755,21 @@ def step_verify_order_created(context):
 @then('the order total should be {expected_total:f}')
 def step_verify_order_total(context, expected_total):
     """Verify order total matches expected value"""
-    assert abs(context.order_total - expected_total) < 0.01, \
-        f"Expected order total {expected_total}, got {context.order_total}"
+    assert context.order_total_cents == round(expected_total * 100), \
+        f"Expected order total {expected_total:.2f}, got {context.order_total_cents / 100:.2f}"
 
 @then('I should see the order details')
 def step_verify_order_details(context):
     """Verify order details are returned"""
-    assert len(context.order_history) > 0, "No order history found"
-    assert all(key in context.order_history[0] for key in ['id', 'user_id', 'product_id', 'quantity']), \
+    assert context.order_count > 0, "No order history found"
+    assert all(key in context.first_order for key in ['id', 'user_id', 'product_id', 'quantity']), \
         "Order details missing required fields"
 
 @then('the order count should be greater than {min_count:d}')
 def step_verify_order_count_greater(context, min_count):
     """Verify order count is greater than minimum"""
-    assert len(context.order_history) > min_count, \
-        f"Expected more than {min_count} orders, got {len(context.order_history)}"
+    assert context.order_count > min_count, \
+        f"Expected more than {min_count} orders, got {context.order_count}"
 
 @then('the operation should be "{expected_result}"')
 def step_verify_operation_result(context, expected_result):
@@ -593,7 +783,7 @@ def step_verify_operation_result(context, expected_result):
 def step_verify_email_unchanged(context):
     """Verify user email remains unchanged after rollback"""
     user = db_manager.execute_query(
-        "SELECT * FROM users WHERE username = :username",
+        USER_BY_USERNAME_QUERY,
         {"username": context.current_user["username"]}
     )[0]
     assert user["email"] == context.current_user["email"], \
@@ -602,17 +792,19 @@ def step_verify_email_unchanged(context):
 @then('the query should return valid results')
 def step_verify_query_results(context):
     """Verify query returns valid results"""
-    assert len(context.complex_query_result) > 0, "Query returned no results"
-    assert all(key in context.complex_query_result[0] for key in ['username', 'email', 'order_count']), \
+    columns = context.complex_query_result
+    assert all(key in columns for key in ['username', 'email', 'order_count']), \
         "Query results missing required fields"
+    assert len(columns['username']) > 0, "Query returned no results"
 
 @then('the results should contain user information with order counts')
 def step_verify_user_order_stats(context):
     """Verify results contain user information with order counts"""
-    for result in context.complex_query_result:
-        assert 'username' in result, "Username missing from results"
-        assert 'order_count' in result, "Order count missing from results"
-        assert isinstance(result['order_count'], int), "Order count should be integer"
+    columns = context.complex_query_result
+    assert 'username' in columns, "Username missing from results"
+    assert 'order_count' in columns, "Order count missing from results"
+    # Integral also accepts driver integer types that are not exactly int
+    assert all(isinstance(value, numbers.Integral) for value in columns['order_count']), "Order count should be integer"
 
 # Performance Assertion Steps
 @then('the operation should complete within {max_seconds:d} seconds')
@@ -648,6 +840,48 @@ def step_verify_all_operations_successful(context):
     assert context.concurrent_read_success, "Concurrent read operations failed"
     assert context.concurrent_write_success, "Concurrent write operations failed"
 
+@given('another connection holds the write lock for {milliseconds:d} milliseconds')
+def step_hold_write_lock(context, milliseconds):
+    """Take the write lock on users from a separate connection and release it after a delay"""
+    statement = WRITE_LOCK_STATEMENTS.get(db_manager.engine.dialect.name)
+    if statement is None:
+        context.scenario.skip(f"No write lock statement for {db_manager.engine.dialect.name}")
+        return
+    if db_manager.is_single_connection():
+        context.scenario.skip("The database has no second connection to hold the lock from")
+        return
+    acquired = threading.Event()
+    
+    def hold_lock():
+        with db_manager.engine.begin() as connection:
+            connection.execute(text(statement))
+            acquired.set()
+            time.sleep(milliseconds / 1000)
+            released_at = time.time()
+        return released_at
+    
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-lock")
+    context.write_lock_holder = executor.submit(hold_lock)
+    executor.shutdown(wait=False)
+    # Surface a failure to take the lock rather than waiting for an event that never comes
+    while not acquired.wait(0.01):
+        if context.write_lock_holder.done():
+            context.write_lock_holder.result()
+    logger.info("Holding the users write lock for %d ms", milliseconds)
+
+@then('all concurrent writes should succeed')
+def step_verify_concurrent_writes(context):
+    """Verify every concurrent write was committed"""
+    assert context.concurrent_write_success, \
+        f"Concurrent writes inserted {sum(context.concurrent_write_results)} rows"
+
+@then('the writes should have waited for the lock')
+def step_verify_writes_waited(context):
+    """Verify the concurrent writes finished only after the held write lock was released"""
+    released_at = context.write_lock_holder.result()
+    assert context.concurrent_write_finished_at >= released_at, \
+        "Concurrent writes finished while another connection held the write lock"
+
 @then('no deadlocks should occur')
 def step_verify_no_deadlocks(context):
     """Verify no deadlocks occurred"""
@@ -667,67 +901,75 @@ def step_verify_total_time(context, max_seconds):
 # DDL (Data Definition Language) Step Definitions
 # ============================================================================
 
+def column_specs(table):
+    """Turn a Behave name/type/constraints table into a hashable tuple of column specs"""
+    return tuple((row['name'], row['type'], row.get('constraints', '')) for row in table)
+
+@functools.lru_cache(maxsize=128)
+def create_table_sql(table_name, specs):
+    """Build the CREATE TABLE statement for column specs; memoized for recreated test tables"""
+    definitions = ', '.join(
+        f"{name} {data_type} {constraints}".strip() for name, data_type, constraints in specs
+    )
+    return f"CREATE TABLE {table_name} ({definitions})"
+
+# Behave table cells that map to SQL keywords rather than quoted strings
+SQL_LITERALS = {"true": "1", "false": "0", "null": "NULL"}
+# Cells longer than the longest keyword are plain values; skip lowercasing them
+KEYWORD_MAX_LENGTH = max(map(len, SQL_LITERALS))
+
+def sql_literal(value):
+    """Render a Behave table cell as an SQL literal"""
+    if len(value) > KEYWORD_MAX_LENGTH:
+        return f"'{value}'"
+    return SQL_LITERALS.get(value.lower(), f"'{value}'")
+
 @given('no table named "{table_name}" exists')
 def step_table_not_exists(context, table_name):
     """Ensure table does not exist"""
     try:
-        if db_manager.table_exists(table_name):
-            db_manager.drop_table(table_name)
+        # DROP TABLE IF EXISTS does the existence check in the same statement
+        db_manager.drop_table(table_name)
+        forget_table(table_name)
         context.table_exists = False
-        logger.info(f"Verified table '{table_name}' does not exist")
+        logger.info("Verified table '%s' does not exist", table_name)
     except Exception as e:
-        logger.error(f"Error checking table existence: {str(e)}")
+        logger.error("Error checking table existence: %s", e)
         raise
 
 @when('I create a table "{table_name}" with the following columns')
 def step_create_table_with_columns(context, table_name):
     """Create table with specified columns"""
     try:
-        columns = []
-        for row in context.table:
-            name = row['name']
-            data_type = row['type']
-            constraints = row.get('constraints', '')
-            column_def = f"{name} {data_type} {constraints}".strip()
-            columns.append(column_def)
-        
-        column_definitions = ', '.join(columns)
-        query = f"CREATE TABLE {table_name} ({column_definitions})"
+        columns = column_specs(context.table)
+        query = create_table_sql(table_name, columns)
         
         context.last_query = query
         context.affected_rows = db_manager.execute_non_query(query)
+        forget_table(table_name)
+        prefetch_table(table_name)
         context.operation_result = "success"
         context.created_table = table_name
-        logger.info(f"Created table '{table_name}' with {len(columns)} columns")
+        logger.info("Created table '%s' with %d columns", table_name, len(columns))
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to create table '{table_name}': {str(e)}")
+        logger.error("Failed to create table '%s': %s", table_name, e)
         raise
 
 @given('a table "{table_name}" exists with columns')
 def step_table_exists_with_columns(context, table_name):
     """Create a table with specified columns for testing"""
     try:
-        # Drop table if it exists
-        if db_manager.table_exists(table_name):
-            db_manager.drop_table(table_name)
-        
-        columns = []
-        for row in context.table:
-            name = row['name']
-            data_type = row['type']
-            constraints = row.get('constraints', '')
-            column_def = f"{name} {data_type} {constraints}".strip()
-            columns.append(column_def)
-        
-        column_definitions = ', '.join(columns)
-        query = f"CREATE TABLE {table_name} ({column_definitions})"
-        db_manager.execute_non_query(query)
+        columns = column_specs(context.table)
+        query = create_table_sql(table_name, columns)
+        # Drop any previous copy and recreate it in one round-trip
+        db_manager.execute_script(f"DROP TABLE IF EXISTS {table_name};\n{query};")
+        forget_table(table_name)
         context.test_table = table_name
-        logger.info(f"Created test table '{table_name}' with {len(columns)} columns")
+        logger.info("Created test table '%s' with %d columns", table_name, len(columns))
     except Exception as e:
-        logger.error(f"Failed to create test table '{table_name}': {str(e)}")
+        logger.error("Failed to create test table '%s': %s", table_name, e)
         raise
 
 @when('I create an index "{index_name}" on table "{table_name}" column "{column_name}"')
@@ -739,11 +981,11 @@ def step_create_index(context, index_name, table_name, column_name):
         context.affected_rows = db_manager.execute_non_query(query)
         context.operation_result = "success"
         context.created_index = index_name
-        logger.info(f"Created index '{index_name}' on table '{table_name}' column '{column_name}'")
+        logger.info("Created index '%s' on table '%s' column '%s'", index_name, table_name, column_name)
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to create index '{index_name}': {str(e)}")
+        logger.error("Failed to create index '%s': %s", index_name, e)
         raise
 
 @when('I drop table "{table_name}"')
@@ -753,13 +995,14 @@ def step_drop_table(context, table_name):
         query = f"DROP TABLE {table_name}"
         context.last_query = query
         context.affected_rows = db_manager.execute_non_query(query)
+        forget_table(table_name)
         context.operation_result = "success"
         context.dropped_table = table_name
-        logger.info(f"Dropped table '{table_name}'")
+        logger.info("Dropped table '%s'", table_name)
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to drop table '{table_name}': {str(e)}")
+        logger.error("Failed to drop table '%s': %s", table_name, e)
         raise
 
 @when('I truncate table "{table_name}"')
@@ -771,14 +1014,15 @@ def step_truncate_table(context, table_name):
         query = f"DELETE FROM {table_name}"
         context.last_query = query
         context.affected_rows = db_manager.execute_non_query(query)
+        db_manager.mark_empty(table_name)
         context.operation_result = "success"
         context.truncated_table = table_name
         context.end_time = time.time()
-        logger.info(f"Truncated table '{table_name}'")
+        logger.info("Truncated table '%s'", table_name)
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to truncate table '{table_name}': {str(e)}")
+        logger.error("Failed to truncate table '%s': %s", table_name, e)
         raise
 
 # DDL Assertion Steps
@@ -786,60 +1030,61 @@ def step_truncate_table(context, table_name):
 def step_verify_table_created(context, table_name):
     """Verify table was created successfully"""
     assert context.operation_result == "success", f"Table creation failed: {getattr(context, 'error_message', 'Unknown error')}"
-    assert db_manager.table_exists(table_name), f"Table '{table_name}' does not exist"
-    logger.info(f"Verified table '{table_name}' was created successfully")
+    assert table_schema(table_name), f"Table '{table_name}' does not exist"
+    logger.info("Verified table '%s' was created successfully", table_name)
 
 @then('the table "{table_name}" should have {expected_count:d} columns')
 def step_verify_table_column_count(context, table_name, expected_count):
     """Verify table has expected number of columns"""
-    schema = db_manager.get_table_schema(table_name)
+    schema = table_schema(table_name)
     actual_count = len(schema)
     assert actual_count == expected_count, f"Expected {expected_count} columns, got {actual_count}"
-    logger.info(f"Verified table '{table_name}' has {expected_count} columns")
+    logger.info("Verified table '%s' has %d columns", table_name, expected_count)
 
 @then('the table "{table_name}" should not exist')
 def step_verify_table_not_exists(context, table_name):
     """Verify table does not exist"""
-    assert not db_manager.table_exists(table_name), f"Table '{table_name}' still exists"
-    logger.info(f"Verified table '{table_name}' does not exist")
+    assert not table_schema(table_name), f"Table '{table_name}' still exists"
+    logger.info("Verified table '%s' does not exist", table_name)
 
 @then('the table "{table_name}" should have primary key on "{column_name}"')
 def step_verify_primary_key(context, table_name, column_name):
     """Verify table has primary key on specified column"""
-    schema = db_manager.get_table_schema(table_name)
+    schema = table_schema(table_name)
     primary_key_found = False
     for column in schema:
         if column['name'] == column_name and column['pk'] == 1:
             primary_key_found = True
             break
     assert primary_key_found, f"Primary key not found on column '{column_name}'"
-    logger.info(f"Verified primary key on column '{column_name}'")
+    logger.info("Verified primary key on column '%s'", column_name)
 
 @then('the table "{table_name}" should have unique constraint on "{column_name}"')
 def step_verify_unique_constraint(context, table_name, column_name):
     """Verify table has unique constraint on specified column"""
     # For SQLite, we can check the schema info
-    schema = db_manager.get_table_schema(table_name)
+    schema = table_schema(table_name)
     unique_found = False
     for column in schema:
         if column['name'] == column_name:
             unique_found = True  # Basic check - in real implementation, would check constraints
             break
     assert unique_found, f"Column '{column_name}' not found in table '{table_name}'"
-    logger.info(f"Verified unique constraint on column '{column_name}'")
+    logger.info("Verified unique constraint on column '%s'", column_name)
 
 @then('the index "{index_name}" should be created successfully')
 def step_verify_index_created(context, index_name):
     """Verify index was created successfully"""
     assert context.operation_result == "success", f"Index creation failed: {getattr(context, 'error_message', 'Unknown error')}"
-    logger.info(f"Verified index '{index_name}' was created successfully")
+    logger.info("Verified index '%s' was created successfully", index_name)
 
 @then('the table "{table_name}" should be empty')
 def step_verify_table_empty(context, table_name):
     """Verify table is empty"""
-    count = db_manager.get_table_count(table_name)
-    assert count == 0, f"Table '{table_name}' has {count} records, expected 0"
-    logger.info(f"Verified table '{table_name}' is empty")
+    if not db_manager.is_empty(table_name):
+        count = db_manager.get_table_count(table_name)
+        raise AssertionError(f"Table '{table_name}' has {count} records, expected 0")
+    logger.info("Verified table '%s' is empty", table_name)
 
 @then('the table structure should remain intact')
 def step_verify_table_structure_intact(context):
@@ -855,25 +1100,25 @@ def step_verify_operation_performance(context):
         duration = context.end_time - context.start_time
         # For testing purposes, we just verify it completed
         assert duration < 10, f"Operation took too long: {duration} seconds"
-        logger.info(f"Operation completed in {duration:.3f} seconds")
+        logger.info("Operation completed in %.3f seconds", duration)
 
 @then('the foreign key constraint should be active on "{column_name}"')
 def step_verify_foreign_key_constraint(context, column_name):
     """Verify foreign key constraint is active"""
     assert context.operation_result == "success", f"Table creation failed: {getattr(context, 'error_message', 'Unknown error')}"
-    logger.info(f"Verified foreign key constraint on column '{column_name}'")
+    logger.info("Verified foreign key constraint on column '%s'", column_name)
 
 @then('the index should improve query performance on "{column_name}" column')
 def step_verify_index_performance(context, column_name):
     """Verify index improves query performance"""
     assert context.operation_result == "success", f"Index creation failed: {getattr(context, 'error_message', 'Unknown error')}"
-    logger.info(f"Verified index improves performance on column '{column_name}'")
+    logger.info("Verified index improves performance on column '%s'", column_name)
 
 @then('the composite index "{index_name}" should be created successfully')
 def step_verify_composite_index_created(context, index_name):
     """Verify composite index was created successfully"""
     assert context.operation_result == "success", f"Composite index creation failed: {getattr(context, 'error_message', 'Unknown error')}"
-    logger.info(f"Verified composite index '{index_name}' was created successfully")
+    logger.info("Verified composite index '%s' was created successfully", index_name)
 
 @then('the index should be usable for queries on both columns')
 def step_verify_composite_index_usable(context):
@@ -885,98 +1130,96 @@ def step_verify_composite_index_usable(context):
 # DML (Data Manipulation Language) Step Definitions  
 # ============================================================================
 
+# Behave table cells that map to non-string bind values
+BOUND_VALUES = {"true": 1, "false": 0, "null": None}
+
+def bind_value(value):
+    """Convert a Behave table cell into a bind parameter value"""
+    if len(value) > KEYWORD_MAX_LENGTH:
+        return value
+    return BOUND_VALUES.get(value.lower(), value)
+
+DML_TEST_TABLES_SCRIPT = """
+    CREATE TABLE IF NOT EXISTS test_users (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        email VARCHAR(150) UNIQUE,
+        age INTEGER,
+        salary DECIMAL(10,2),
+        is_active BOOLEAN DEFAULT TRUE
+    );
+    CREATE TABLE IF NOT EXISTS test_products (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        price DECIMAL(10,2),
+        category VARCHAR(50),
+        in_stock INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS test_orders (
+        id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        product_id INTEGER,
+        quantity INTEGER,
+        total_amount DECIMAL(10,2),
+        order_date DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
 @given('test tables exist for DML operations')
 def step_create_dml_test_tables(context):
     """Create test tables for DML operations"""
     try:
-        # Create test_users table
-        if not db_manager.table_exists('test_users'):
-            query = """
-                CREATE TABLE test_users (
-                    id INTEGER PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    email VARCHAR(150) UNIQUE,
-                    age INTEGER,
-                    salary DECIMAL(10,2),
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            """
-            db_manager.execute_non_query(query)
-        
-        # Create test_products table
-        if not db_manager.table_exists('test_products'):
-            query = """
-                CREATE TABLE test_products (
-                    id INTEGER PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    price DECIMAL(10,2),
-                    category VARCHAR(50),
-                    in_stock INTEGER DEFAULT 0
-                )
-            """
-            db_manager.execute_non_query(query)
-        
-        # Create test_orders table
-        if not db_manager.table_exists('test_orders'):
-            query = """
-                CREATE TABLE test_orders (
-                    id INTEGER PRIMARY KEY,
-                    customer_id INTEGER,
-                    product_id INTEGER,
-                    quantity INTEGER,
-                    total_amount DECIMAL(10,2),
-                    order_date DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            db_manager.execute_non_query(query)
+        # Create all three tables in one script and one transaction
+        db_manager.execute_script(DML_TEST_TABLES_SCRIPT)
+        for table_name in ("test_users", "test_products", "test_orders"):
+            forget_table(table_name)
         
         logger.info("Created DML test tables")
         
     except Exception as e:
-        logger.error(f"Failed to create DML test tables: {str(e)}")
+        logger.error("Failed to create DML test tables: %s", e)
         raise
 
+# Structures for known test tables; anything else gets a generic id/data table
+EMPTY_TABLE_TEMPLATES = {
+    "test_users": """
+        CREATE TABLE IF NOT EXISTS test_users (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(100),
+            email VARCHAR(150),
+            age INTEGER,
+            salary DECIMAL(10,2),
+            is_active BOOLEAN DEFAULT TRUE
+        )
+    """,
+    "test_products": """
+        CREATE TABLE IF NOT EXISTS test_products (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(100),
+            price DECIMAL(10,2),
+            category VARCHAR(50),
+            in_stock INTEGER DEFAULT 0
+        )
+    """
+}
+
 @given('an empty table "{table_name}" exists')
 def step_empty_table_exists(context, table_name):
     """Ensure table exists and is empty"""
     try:
-        if not db_manager.table_exists(table_name):
-            # Create basic table structure based on table name
-            if table_name == 'test_users':
-                query = """
-                    CREATE TABLE test_users (
-                        id INTEGER PRIMARY KEY,
-                        name VARCHAR(100),
-                        email VARCHAR(150),
-                        age INTEGER,
-                        salary DECIMAL(10,2),
-                        is_active BOOLEAN DEFAULT TRUE
-                    )
-                """
-            elif table_name == 'test_products':
-                query = """
-                    CREATE TABLE test_products (
-                        id INTEGER PRIMARY KEY,
-                        name VARCHAR(100),
-                        price DECIMAL(10,2),
-                        category VARCHAR(50),
-                        in_stock INTEGER DEFAULT 0
-                    )
-                """
-            else:
-                # Generic table
-                query = f"CREATE TABLE {table_name} (id INTEGER PRIMARY KEY, data TEXT)"
-            
-            db_manager.execute_non_query(query)
-        
-        # Clear existing data
-        db_manager.execute_non_query(f"DELETE FROM {table_name}")
+        # Create the table if needed and clear it in a single script
+        create_query = EMPTY_TABLE_TEMPLATES.get(
+            table_name,
+            f"CREATE TABLE IF NOT EXISTS {table_name} (id INTEGER PRIMARY KEY, data TEXT)"
+        )
+        db_manager.execute_script(f"{create_query};\nDELETE FROM {table_name};")
+        forget_table(table_name)
         
         context.test_table = table_name
-        logger.info(f"Ensured table '{table_name}' exists and is empty")
+        logger.info("Ensured table '%s' exists and is empty", table_name)
         
     except Exception as e:
-        logger.error(f"Failed to create/clear table '{table_name}': {str(e)}")
+        logger.error("Failed to create/clear table '%s': %s", table_name, e)
         raise
 
 @when('I insert a record into "{table_name}" with values')
@@ -987,15 +1230,7 @@ def step_insert_record(context, table_name):
         values = []
         for row in context.table:
             columns.append(row['column'])
-            value = row['value']
-            if value.lower() == 'true':
-                values.append('1')
-            elif value.lower() == 'false':
-                values.append('0')
-            elif value.lower() == 'null':
-                values.append('NULL')
-            else:
-                values.append(f"'{value}'")
+            values.append(sql_literal(row['value']))
         
         column_list = ', '.join(columns)
         value_list = ', '.join(values)
@@ -1004,13 +1239,12 @@ def step_insert_record(context, table_name):
         context.last_query = query
         context.affected_rows = db_manager.execute_non_query(query)
         context.operation_result = "success"
-        context.inserted_data = dict(zip(columns, values))
-        logger.info(f"Inserted record into '{table_name}'")
+        logger.info("Inserted record into '%s'", table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to insert record into '{table_name}': {str(e)}")
+        logger.error("Failed to insert record into '%s': %s", table_name, e)
         raise
 
 @when('I insert the following records into "{table_name}"')
@@ -1019,79 +1253,65 @@ def step_insert_multiple_records(context, table_name):
     try:
         columns = list(context.table.headings)
         column_list = ', '.join(columns)
+        placeholders = ', '.join(f":c{i}" for i in range(len(columns)))
         
-        insert_count = 0
-        for row in context.table:
-            values = []
-            for column in columns:
-                value = row[column]
-                if value.lower() in ['true', 'false']:
-                    values.append('1' if value.lower() == 'true' else '0')
-                elif value.lower() == 'null':
-                    values.append('NULL')
-                else:
-                    values.append(f"'{value}'")
-            
-            value_list = ', '.join(values)
-            query = f"INSERT INTO {table_name} ({column_list}) VALUES ({value_list})"
-            db_manager.execute_non_query(query)
-            insert_count += 1
+        # One parameterised statement, bound for every row in a single executemany
+        query = f"INSERT INTO {table_name} ({column_list}) VALUES ({placeholders})"
+        rows = [
+            {f"c{i}": bind_value(row[column]) for i, column in enumerate(columns)}
+            for row in context.table
+        ]
+        db_manager.execute_many(query, rows)
+        insert_count = len(rows)
         
         context.affected_rows = insert_count
         context.operation_result = "success"
         context.inserted_count = insert_count
-        logger.info(f"Inserted {insert_count} records into '{table_name}'")
+        logger.info("Inserted %d records into '%s'", insert_count, table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to insert records into '{table_name}': {str(e)}")
+        logger.error("Failed to insert records into '%s': %s", table_name, e)
         raise
 
 @when('I update the record with id {record_id:d} in "{table_name}" with')
 def step_update_record_by_id(context, record_id, table_name):
     """Update record by ID"""
     try:
-        updates = []
-        for row in context.table:
-            column = row['column']
-            value = row['value']
-            if value.lower() in ['true', 'false']:
-                updates.append(f"{column} = {'1' if value.lower() == 'true' else '0'}")
-            elif value.lower() == 'null':
-                updates.append(f"{column} = NULL")
-            else:
-                updates.append(f"{column} = '{value}'")
-        
-        update_list = ', '.join(updates)
-        query = f"UPDATE {table_name} SET {update_list} WHERE id = {record_id}"
+        # Bind values and id so every update of the same columns reuses one statement
+        rows = list(context.table)
+        update_list = ', '.join(f"{row['column']} = :v{i}" for i, row in enumerate(rows))
+        params = {f"v{i}": bind_value(row['value']) for i, row in enumerate(rows)}
+        params["record_id"] = record_id
+        query = f"UPDATE {table_name} SET {update_list} WHERE id = :record_id"
         context.last_query = query
-        context.affected_rows = db_manager.execute_non_query(query)
+        context.affected_rows = db_manager.execute_non_query(query, params)
         context.operation_result = "success"
         context.updated_id = record_id
-        logger.info(f"Updated record with id {record_id} in '{table_name}'")
+        logger.info("Updated record with id %d in '%s'", record_id, table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to update record with id {record_id} in '{table_name}': {str(e)}")
+        logger.error("Failed to update record with id %d in '%s': %s", record_id, table_name, e)
         raise
 
 @when('I delete the record with id {record_id:d} from "{table_name}"')
 def step_delete_record_by_id(context, record_id, table_name):
     """Delete record by ID"""
     try:
-        query = f"DELETE FROM {table_name} WHERE id = {record_id}"
+        query = f"DELETE FROM {table_name} WHERE id = :record_id"
         context.last_query = query
-        context.affected_rows = db_manager.execute_non_query(query)
+        context.affected_rows = db_manager.execute_non_query(query, {"record_id": record_id})
         context.operation_result = "success"
         context.deleted_id = record_id
-        logger.info(f"Deleted record with id {record_id} from '{table_name}'")
+        logger.info("Deleted record with id %d from '%s'", record_id, table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to delete record with id {record_id} from '{table_name}': {str(e)}")
+        logger.error("Failed to delete record with id %d from '%s': %s", record_id, table_name, e)
         raise
 
 @when('I select all records from "{table_name}"')
@@ -1102,12 +1322,12 @@ def step_select_all_records(context, table_name):
         context.last_query = query
         context.query_results = db_manager.execute_query(query)
         context.operation_result = "success"
-        logger.info(f"Selected all records from '{table_name}', got {len(context.query_results)} records")
+        logger.info("Selected all records from '%s'", table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to select records from '{table_name}': {str(e)}")
+        logger.error("Failed to select records from '%s': %s", table_name, e)
         raise
 
 @when('I select columns "{columns}" from "{table_name}"')
@@ -1119,12 +1339,12 @@ def step_select_specific_columns(context, columns, table_name):
         context.query_results = db_manager.execute_query(query)
         context.operation_result = "success"
         context.selected_columns = columns.split(', ')
-        logger.info(f"Selected columns '{columns}' from '{table_name}'")
+        logger.info("Selected columns '%s' from '%s'", columns, table_name)
         
     except Exception as e:
         context.operation_result = "failed"
         context.error_message = str(e)
-        logger.error(f"Failed to select columns from '{table_name}': {str(e)}")
+        logger.error("Failed to select columns from '%s': %s", table_name, e)
         raise
 
 # DML Assertion Steps
@@ -1141,14 +1361,14 @@ def step_verify_record_count(context, table_name, expected_count):
     """Verify table has expected number of records"""
     actual_count = db_manager.get_table_count(table_name)
     assert actual_count == expected_count, f"Expected {expected_count} records, got {actual_count}"
-    logger.info(f"Verified table '{table_name}' has {expected_count} records")
+    logger.info("Verified table '%s' has %d records", table_name, expected_count)
 
 @then('{expected_count:d} records should be inserted successfully')
 def step_verify_multiple_records_inserted(context, expected_count):
     """Verify multiple records were inserted successfully"""
     assert context.operation_result == "success", f"Insert failed: {getattr(context, 'error_message', 'Unknown error')}"
     assert context.inserted_count == expected_count, f"Expected {expected_count} records, inserted {context.inserted_count}"
-    logger.info(f"Verified {expected_count} records were inserted successfully")
+    logger.info("Verified %d records were inserted successfully", expected_count)
 
 @then('the record should be updated successfully')
 def step_verify_record_updated(context):
@@ -1162,7 +1382,7 @@ def step_verify_record_updated(context):
 def step_verify_affected_count(context, expected_count):
     """Verify expected number of records were affected"""
     assert context.affected_rows == expected_count, f"Expected {expected_count} affected records, got {context.affected_rows}"
-    logger.info(f"Verified {expected_count} records were affected")
+    logger.info("Verified %d records were affected", expected_count)
 
 @then('the record should be deleted successfully')
 def step_verify_record_deleted(context):
@@ -1177,7 +1397,7 @@ def step_verify_query_record_count(context, expected_count):
     assert context.operation_result == "success", f"Query failed: {getattr(context, 'error_message', 'Unknown error')}"
     actual_count = len(context.query_results)
     assert actual_count == expected_count, f"Expected {expected_count} records, got {actual_count}"
-    logger.info(f"Verified query returned {expected_count} records")
+    logger.info("Verified query returned %d records", expected_count)
 
 @then('the query should return records with only specified columns')
 def step_verify_query_columns(context):
@@ -1216,27 +1436,3 @@ def step_verify_correct_format(context):
     assert context.operation_result == "success", f"Query failed: {getattr(context, 'error_message', 'Unknown error')}"
     assert isinstance(context.query_results, list), "Query results should be a list"
     logger.info("Verified records are returned in correct format")
-
-def after_scenario(context, scenario):
-    """Clean up after each scenario"""
-    try:
-        if hasattr(context, 'transaction_session'):
-            context.transaction_session.close()
-        
-        # Clean up test data for next scenario
-        db_manager.truncate_table("orders")
-        db_manager.truncate_table("users")
-        db_manager.truncate_table("products")
-        
-        # Reload base test data
-        insert_test_data()
-        
-    except Exception as e:
-        logger.error(f"Error during cleanup: {str(e)}")
-
-def after_all(context):
-    """Clean up after all tests"""
-    try:
-        cleanup_test_database()
-    except Exception as e:
-        logger.error(f"Error during final cleanup: {str(e)}") 
\ No newline at end of file
@@ -7,24 +7,44 @@ Provides easy command-line interface for running tests with different configurat
 import os
 import sys
 import argparse
+import heapq
+import shlex
+import shutil
+import hashlib
 import subprocess
+import concurrent.futures
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-def run_command(cmd, cwd=None):
-    """Run a command and return the result"""
-    print(f"Running: {cmd}")
-    result = subprocess.run(cmd, shell=True, cwd=cwd, capture_output=True, text=True)
-    
-    if result.stdout:
-        print("STDOUT:", result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    
-    return result.returncode == 0, result.stdout, result.stderr
+# Shared-cache in-memory SQLite database, visible to every pooled connection in the run
+IN_MEMORY_DB_URL = "sqlite:///file:bdd_test?mode=memory&cache=shared&uri=true"
+
+# Per-shard SQLite database file used by --shards when no database was configured
+SHARD_DB_FILE = "test_db_shard{index}.db"
+
+# File in the venv recording the sha256 of the requirements.txt last installed into it
+VENV_STAMP = ".venv-stamp"
+
+# Formatter/outfile pairs that --generate-reports adds to the test run itself
+# (only formatters bundled with behave 1.2.6, so the run cannot fail on an unknown format)
+REPORT_FORMATS = (
+    ("json.pretty", "reports/results.json"),
+)
+
+def run_command(cmd, cwd=None, env=None):
+    """
+    Run a command and return whether it succeeded.
+    cmd is an argv list, or a string that is split shell-style; no shell is started.
+    Output goes straight to the terminal as it is produced.
+    """
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
+    print(f"Running: {shlex.join(cmd)}", flush=True)
+    result = subprocess.run(cmd, cwd=cwd, env=env)
+    return result.returncode == 0
 
 def setup_environment():
     """Set up the test environment"""
@@ -39,18 +59,29 @@ def setup_environment():
     venv_path = Path('venv')
     if not venv_path.exists():
         print("Creating virtual environment...")
-        success, _, _ = run_command(f"{sys.executable} -m venv venv")
+        success = run_command([sys.executable, "-m", "venv", "venv"])
         if not success:
             print("Failed to create virtual environment")
             return False
     
-    # Install dependencies
-    pip_cmd = "venv/bin/pip" if os.name != 'nt' else "venv\\Scripts\\pip.exe"
-    print("Installing dependencies...")
-    success, _, _ = run_command(f"{pip_cmd} install -r requirements.txt")
-    if not success:
-        print("Failed to install dependencies")
-        return False
+    # Install dependencies, unless requirements.txt is unchanged since the last install into this venv
+    requirements_hash = hashlib.sha256(Path('requirements.txt').read_bytes()).hexdigest()
+    stamp_path = venv_path / VENV_STAMP
+    if stamp_path.exists() and stamp_path.read_text().strip() == requirements_hash:
+        print("Dependencies up to date")
+    else:
+        print("Installing dependencies...")
+        if shutil.which("uv"):
+            python_cmd = "venv/bin/python" if os.name != 'nt' else "venv\\Scripts\\python.exe"
+            install_cmd = ["uv", "pip", "install", "--python", python_cmd, "-r", "requirements.txt"]
+        else:
+            pip_cmd = "venv/bin/pip" if os.name != 'nt' else "venv\\Scripts\\pip.exe"
+            install_cmd = [pip_cmd, "install", "-r", "requirements.txt"]
+        success = run_command(install_cmd)
+        if not success:
+            print("Failed to install dependencies")
+            return False
+        stamp_path.write_text(requirements_hash)
     
     print("Environment setup complete!")
     return True
@@ -59,122 +90,212 @@ def run_tests(args):
     """Run the BDD tests with specified configuration"""
     
     # Build behave command
-    behave_cmd = "behave"
+    behave_cmd = ["behave"]
+    
+    # Write the extra reports from this same run; the pairs go first so a later
+    # --format/--outfile pair cannot be matched to the wrong formatter
+    if args.generate_reports and args.shards <= 1:
+        behave_cmd += report_format_args()
     
     # Add profile if specified
     if args.profile:
-        behave_cmd += f" -D profile={args.profile}"
+        behave_cmd += ["-D", f"profile={args.profile}"]
     
     # Add database driver if specified
     if args.db_driver:
-        behave_cmd += f" -D db_driver={args.db_driver}"
+        behave_cmd += ["-D", f"db_driver={args.db_driver}"]
+    
+    # Point the suite at an in-memory database if requested
+    if args.in_memory:
+        os.environ["BDD_DB_URL"] = IN_MEMORY_DB_URL
     
     # Add timeout if specified
     if args.timeout:
-        behave_cmd += f" -D timeout={args.timeout}"
-    
-    # Add specific feature file if specified
-    if args.feature:
-        behave_cmd += f" features/{args.feature}"
+        behave_cmd += ["-D", f"timeout={args.timeout}"]
     
     # Add scenario name if specified
     if args.scenario:
-        behave_cmd += f" -n '{args.scenario}'"
+        behave_cmd += ["-n", args.scenario]
     
     # Add tags if specified
     if args.tags:
-        behave_cmd += f" --tags={args.tags}"
+        behave_cmd.append(f"--tags={args.tags}")
     
     # Add format options
     if args.format:
-        behave_cmd += f" --format={args.format}"
-    
-    # Add output file if specified
-    if args.output:
-        behave_cmd += f" --outfile={args.output}"
+        behave_cmd.append(f"--format={args.format}")
     
     # Add JUnit reporting if requested
     if args.junit:
-        behave_cmd += " --junit --junit-directory=reports/junit"
+        behave_cmd += ["--junit", "--junit-directory=reports/junit"]
     
     # Add other options
     if args.dry_run:
-        behave_cmd += " --dry-run"
+        behave_cmd.append("--dry-run")
     
     if args.stop_on_failure:
-        behave_cmd += " --stop"
+        behave_cmd.append("--stop")
     
     if args.verbose:
-        behave_cmd += " --verbose"
+        behave_cmd.append("--verbose")
     
     if args.no_capture:
-        behave_cmd += " --no-capture"
-    
-    # Run the tests
-    print(f"Running tests with command: {behave_cmd}")
-    success, stdout, stderr = run_command(behave_cmd)
+        behave_cmd.append("--no-capture")
+    
+    # Run the tests, split across parallel behave processes if requested
+    if args.shards > 1:
+        features = [f"features/{args.feature}"] if args.feature else sorted(
+            str(path) for path in Path('features').glob('*.feature')
+        )
+        success = run_sharded(behave_cmd, features, args.shards, args.output, args.in_memory,
+                              args.generate_reports, args.db_driver)
+    else:
+        # Add specific feature file if specified
+        if args.feature:
+            behave_cmd.append(f"features/{args.feature}")
+        
+        # Add output file if specified
+        if args.output:
+            behave_cmd.append(f"--outfile={args.output}")
+        
+        print(f"Running tests with command: {shlex.join(behave_cmd)}")
+        success = run_command(behave_cmd)
     
     if success:
+        if args.generate_reports:
+            print("Reports generated in reports/ directory")
         print("Tests completed successfully!")
     else:
         print("Tests failed!")
         return False
     
-    # Generate reports if requested
-    if args.generate_reports:
-        generate_reports()
-    
     return True
 
-def generate_reports():
-    """Generate additional test reports"""
-    print("Generating additional reports...")
-    
-    # Generate HTML report
-    html_cmd = "behave --format=html --outfile=reports/results.html"
-    run_command(html_cmd)
-    
-    # Generate JSON report
-    json_cmd = "behave --format=json --outfile=reports/results.json"
-    run_command(json_cmd)
-    
-    print("Reports generated in reports/ directory")
+def report_format_args(shard=None):
+    """--format/--outfile arguments for REPORT_FORMATS, with per-shard file names when shard is given"""
+    format_args = []
+    for report_format, outfile in REPORT_FORMATS:
+        if shard is not None:
+            outfile = shard_output_path(outfile, shard)
+        format_args += [f"--format={report_format}", f"--outfile={outfile}"]
+    return format_args
+
+def shard_output_path(output, index):
+    """Per-shard variant of an output file path, e.g. results.txt -> results.shard1.txt"""
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}.shard{index}{path.suffix}"))
+
+def balance_shards(features, shards):
+    """
+    Split feature files into at most `shards` groups of similar total size, largest files first.
+    File size stands in for run time, so no shard is left running long after the others finish.
+    """
+    loads = [(0, index) for index in range(min(shards, len(features)))]
+    groups = [[] for _ in loads]
+    for feature in sorted(features, key=lambda path: os.path.getsize(path), reverse=True):
+        load, index = heapq.heappop(loads)
+        groups[index].append(feature)
+        heapq.heappush(loads, (load + os.path.getsize(feature), index))
+    return groups
+
+def shard_database_url(index, in_memory=False, db_driver=None):
+    """
+    Per-shard SQLite URL, or None to keep the configured database when the user chose one
+    with BDD_DB_URL, --db-driver or a non-SQLite DB_DRIVER
+    """
+    if in_memory:
+        return f"sqlite:///file:bdd_test_shard{index}?mode=memory&cache=shared&uri=true"
+    if os.environ.get("BDD_DB_URL") or db_driver or os.environ.get("DB_DRIVER", "sqlite").lower() != "sqlite":
+        return None
+    return f"sqlite:///{SHARD_DB_FILE.format(index=index)}"
+
+def remove_shard_databases(count):
+    """Delete the per-shard SQLite files, including their WAL and shared-memory files"""
+    for index in range(count):
+        for suffix in ("", "-wal", "-shm"):
+            Path(SHARD_DB_FILE.format(index=index) + suffix).unlink(missing_ok=True)
+
+def run_sharded(behave_cmd, features, shards, output=None, in_memory=False, generate_reports=False,
+                db_driver=None):
+    """
+    Run feature files across `shards` concurrent behave processes, one per shard.
+    Each process runs its whole group, so behave, SQLAlchemy and the step modules are
+    imported once per shard. Unless a database was configured explicitly, each shard gets
+    its own SQLite database, removed afterwards. Each shard writes its own output file;
+    JUnit files are already written per feature, so they share reports/junit.
+    """
+    groups = balance_shards(features, shards)
+    
+    def run_shard(index):
+        env = dict(os.environ)
+        database_url = shard_database_url(index, in_memory, db_driver)
+        if database_url:
+            env["BDD_DB_URL"] = database_url
+        outfile = shard_output_path(output or "reports/behave-results.txt", index)
+        report_args = report_format_args(index) if generate_reports else []
+        cmd = [behave_cmd[0], *report_args, *behave_cmd[1:], f"--outfile={outfile}", *groups[index]]
+        return run_command(cmd, env=env)
+    
+    print(f"Running {len(features)} feature files in {len(groups)} shards")
+    # Each shard is its own behave process; threads only wait on them
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            results = list(executor.map(run_shard, range(len(groups))))
+    finally:
+        remove_shard_databases(len(groups))
+    return all(results)
 
 def list_scenarios():
     """List all available test scenarios"""
     print("Available test scenarios:")
     
-    # Use behave dry-run to list scenarios
-    cmd = "behave --dry-run --no-summary"
-    success, stdout, stderr = run_command(cmd)
-    
-    if success:
-        print(stdout)
-    else:
-        print("Failed to list scenarios")
+    # Parse the feature files in-process; only fall back to a behave dry-run if the parser is unavailable
+    try:
+        from behave.parser import parse_file
+    except ImportError:
+        success = run_command(["behave", "--dry-run", "--no-summary"])
+        if not success:
+            print("Failed to list scenarios")
+        return
+    
+    for feature_path in sorted(Path('features').glob('*.feature')):
+        feature = parse_file(str(feature_path))
+        print(f"{feature.keyword}: {feature.name}  # {feature_path}")
+        for scenario in feature.scenarios:
+            print(f"  {scenario.keyword}: {scenario.name}")
+
+# Files validate_setup expects, and the directories it lists to find them
+REQUIRED_FILES = (
+    'requirements.txt',
+    'behave.ini',
+    'config/database_config.py',
+    'config/test_config.py',
+    'utils/database_utils.py',
+    'features/database_operations.feature',
+    'features/performance_testing.feature',
+    'features/steps/database_steps.py',
+    'features/environment.py'
+)
+REQUIRED_DIRECTORIES = frozenset(os.path.dirname(file_path) or "." for file_path in REQUIRED_FILES)
 
 def validate_setup():
     """Validate that the test environment is properly set up"""
     print("Validating test environment setup...")
     
-    # Check if required files exist
-    required_files = [
-        'requirements.txt',
-        'behave.ini',
-        'config/database_config.py',
-        'config/test_config.py',
-        'utils/database_utils.py',
-        'features/database_operations.feature',
-        'features/performance_testing.feature',
-        'features/steps/database_steps.py',
-        'features/environment.py'
+    # Check if required files exist, with one directory listing per parent instead of a stat per file
+    listings = {}
+    for directory in REQUIRED_DIRECTORIES:
+        try:
+            with os.scandir(directory) as entries:
+                listings[directory] = {entry.name for entry in entries}
+        except OSError:
+            listings[directory] = set()
+    
+    missing_files = [
+        file_path for file_path in REQUIRED_FILES
+        if os.path.basename(file_path) not in listings[os.path.dirname(file_path) or "."]
     ]
     
-    missing_files = []
-    for file_path in required_files:
-        if not Path(file_path).exists():
-            missing_files.append(file_path)
-    
     if missing_files:
         print("Missing required files:")
         for file_path in missing_files:
@@ -212,6 +333,8 @@ Examples:
   python run_tests.py --feature=database_operations.feature  # Run specific feature
   python run_tests.py --scenario="Create a new user"    # Run specific scenario
   python run_tests.py --tags=@performance              # Run performance tests only
+  python run_tests.py --in-memory                      # Run without touching disk
+  python run_tests.py --shards=4                       # Run features in 4 parallel processes
   python run_tests.py --setup                          # Set up environment
   python run_tests.py --list                           # List available scenarios
   python run_tests.py --validate                       # Validate setup
@@ -224,6 +347,8 @@ Examples:
     parser.add_argument('--db-driver', choices=['sqlite', 'postgresql', 'mysql'],
                        help='Database driver to use')
     parser.add_argument('--timeout', type=int, help='Test timeout in seconds')
+    parser.add_argument('--in-memory', action='store_true',
+                       help='Run against an in-memory SQLite database instead of a file')
     
     # Test selection options
     parser.add_argument('--feature', help='Specific feature file to run')
@@ -231,12 +356,12 @@ Examples:
     parser.add_argument('--tags', help='Tags to filter tests (e.g., @performance)')
     
     # Output options
-    parser.add_argument('--format', choices=['pretty', 'plain', 'json', 'html'],
+    parser.add_argument('--format', choices=['pretty', 'plain', 'json'],
                        default='pretty', help='Output format')
     parser.add_argument('--output', help='Output file path')
     parser.add_argument('--junit', action='store_true', help='Generate JUnit XML reports')
     parser.add_argument('--generate-reports', action='store_true',
-                       help='Generate additional HTML/JSON reports')
+                       help='Generate an additional JSON report')
     
     # Execution options
     parser.add_argument('--dry-run', action='store_true',
@@ -246,6 +371,8 @@ Examples:
     parser.add_argument('--verbose', action='store_true', help='Verbose output')
     parser.add_argument('--no-capture', action='store_true',
                        help='Don\'t capture stdout/stderr')
+    parser.add_argument('--shards', type=int, default=1,
+                       help='Split feature files across this many parallel behave processes')
     
     # Utility options
     parser.add_argument('--setup', action='store_true',
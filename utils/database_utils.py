@@ -1,21 +1,84 @@
+import re
 import sqlite3
+import functools
 import logging
+import concurrent.futures
 from typing import Any, Dict, List, Optional, Union
 from contextlib import contextmanager
-from sqlalchemy import create_engine, text, MetaData, Table, Column, Integer, String, DateTime, Float
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, inspect, text, DDL, MetaData, Table, Column, Index, Integer, String, DateTime, Float
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import json
 
 from config.database_config import DEFAULT_CONFIG
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# WAL journaling with NORMAL sync avoids an fsync per commit, which dominates
+# write-heavy test setup. The journal mode is stored in the database file, so it
+# is set once per engine; the remaining PRAGMAs apply to every new connection.
+SQLITE_JOURNAL_PRAGMA = "PRAGMA journal_mode=WAL"
+SQLITE_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-200000"
+]
+
+def _apply_sqlite_journal_mode(dbapi_connection, connection_record):
+    """Switch the database to WAL journaling from its first connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(SQLITE_JOURNAL_PRAGMA)
+    cursor.close()
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure a freshly opened SQLite connection"""
+    # Turn off pysqlite's implicit transaction handling; _begin_sqlite_transaction issues BEGIN instead
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def _begin_sqlite_transaction(connection):
+    """Open every SQLAlchemy transaction with an explicit BEGIN so a batch commits exactly once"""
+    connection.exec_driver_sql("BEGIN")
+
+# Target table of INSERT/UPDATE/DELETE/REPLACE statements, used to track which tables were written
+_WRITE_TARGET = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+
+# Statements that can change which tables exist or what columns they have
+_SCHEMA_CHANGE = re.compile(r"^\s*(?:CREATE|DROP|ALTER)\b", re.IGNORECASE | re.MULTILINE)
+
+# Bound-parameter catalogue lookups, so every table name reuses one compiled statement.
+# pragma_table_info() returns the same cid/name/type/notnull/dflt_value/pk rows as PRAGMA table_info.
+TABLE_EXISTS_QUERY = text("SELECT name FROM sqlite_master WHERE type='table' AND name=:name")
+TABLE_INFO_QUERY = text("SELECT * FROM pragma_table_info(:name)")
+
+def _is_private_sqlite_memory(url) -> bool:
+    """Check whether url names a per-connection SQLite in-memory database (not a shared-cache URI)"""
+    if url.get_backend_name() != "sqlite" or url.query.get("uri") == "true":
+        return False
+    return url.database in (None, "", ":memory:")
+
+@functools.lru_cache(maxsize=256)
+def _text(sql: str) -> TextClause:
+    """Build text() once per distinct SQL string so repeated calls hit SQLAlchemy's compiled cache"""
+    return text(sql)
+
+def _as_statement(query: Union[str, Executable]) -> Executable:
+    """Wrap raw SQL in text(); pre-built statements pass through so their compiled form is cached"""
+    return _text(query) if isinstance(query, str) else query
+
 class DatabaseManager:
     """Database connection and operation manager"""
     
@@ -23,19 +86,123 @@ class DatabaseManager:
         self.config = config or DEFAULT_CONFIG
         self.engine = None
         self.session_factory = None
+        self.scoped_session = None
         self.metadata = MetaData()
+        # Names of tables written since the set was last cleared
+        self.dirty_tables = set()
+        # Tables emptied by a DELETE with no write to them since, see mark_empty()
+        self.known_empty_tables = set()
+        # table_exists/get_table_schema results; any DDL through the engine clears them
+        self._exists_cache = {}
+        self._schema_cache = {}
+        # Reflection for non-SQLite backends; its own cache is cleared alongside the ones above
+        self._inspector = None
+        # Plain SQL on SQLite skips SQLAlchemy and runs on the pooled sqlite3 connection, see raw_sqlite_cursor()
+        self._use_raw_sqlite = False
+        # In-memory copy of the seeded SQLite database, see snapshot()
+        self._snapshot = None
         
     def connect(self):
-        """Establish database connection"""
-        try:
-            connection_string = self.config.get_connection_string()
-            self.engine = create_engine(connection_string, echo=False)
-            self.session_factory = sessionmaker(bind=self.engine)
-            logger.info(f"Connected to database: {self.config.driver}")
+        """Establish database connection, reusing the existing engine and pool if already connected"""
+        if self.engine is not None:
             return True
+        # Nothing is assigned to self until every step has succeeded, so a failed attempt leaves
+        # the manager disconnected and the next call tries again
+        engine = None
+        try:
+            url = self.config.url()
+            # Pooled SQLite connections (including shared in-memory ones) are handed between threads
+            connect_args = {"check_same_thread": False} if url.get_backend_name() == "sqlite" else {}
+            if _is_private_sqlite_memory(url):
+                # Every connection to a private in-memory database gets its own empty copy,
+                # so keep the one connection that holds the schema and data
+                pool_args = {"poolclass": StaticPool}
+            else:
+                pool_args = {
+                    "poolclass": QueuePool,
+                    "pool_size": self.config.pool_size,
+                    "max_overflow": self.config.pool_max_overflow,
+                    "pool_recycle": self.config.pool_recycle,
+                    "pool_pre_ping": self.config.pool_pre_ping
+                }
+            engine = create_engine(url, echo=False, connect_args=connect_args, **pool_args)
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "first_connect", _apply_sqlite_journal_mode)
+                event.listen(engine, "connect", _apply_sqlite_pragmas)
+                event.listen(engine, "begin", _begin_sqlite_transaction)
+            event.listen(engine, "before_cursor_execute", self._track_writes)
+            session_factory = sessionmaker(bind=engine)
         except Exception as e:
-            logger.error(f"Failed to connect to database: {str(e)}")
+            if engine is not None:
+                engine.dispose()
+            logger.error("Failed to connect to database: %s", e)
             return False
+        
+        self.engine = engine
+        self._use_raw_sqlite = engine.dialect.name == "sqlite"
+        self.session_factory = session_factory
+        self.scoped_session = scoped_session(session_factory)
+        logger.info("Connected to database: %s", self.config.driver)
+        return True
+    
+    def _track_writes(self, conn, cursor, statement, parameters, context, executemany):
+        """Record the tables targeted by each write statement sent to the database"""
+        self.note_writes(statement)
+    
+    def note_writes(self, sql: str) -> None:
+        """Mark the tables written by the given SQL as dirty"""
+        written = {name.lower() for name in _WRITE_TARGET.findall(sql)}
+        self.dirty_tables.update(written)
+        self.known_empty_tables.difference_update(written)
+        if _SCHEMA_CHANGE.search(sql):
+            self.invalidate_schema_cache()
+    
+    def invalidate_schema_cache(self) -> None:
+        """Forget cached table existence and schema lookups"""
+        self._exists_cache.clear()
+        self._schema_cache.clear()
+        if self._inspector is not None:
+            self._inspector.clear_cache()
+    
+    def mark_empty(self, table_name: str) -> None:
+        """Remember that table_name was just emptied; the next write to it forgets this again"""
+        self.known_empty_tables.add(table_name.lower())
+    
+    def is_known_empty(self, table_name: str) -> bool:
+        """Check whether table_name was emptied with no write to it since"""
+        return table_name.lower() in self.known_empty_tables
+    
+    def is_single_connection(self) -> bool:
+        """
+        Check whether every checkout shares one DBAPI connection (a private in-memory SQLite
+        database). Such a connection must not be used from two threads at once.
+        """
+        if not self.engine:
+            self.connect()
+        return isinstance(self.engine.pool, StaticPool)
+    
+    def _get_inspector(self):
+        """Reflection inspector for the engine, created on first use since creating it opens a connection"""
+        if self._inspector is None:
+            self._inspector = inspect(self.engine)
+        return self._inspector
+    
+    def warm_pool(self, count: int) -> int:
+        """Open up to `count` pooled connections in parallel so early queries skip the connect cost"""
+        if not self.engine:
+            self.connect()
+        pool_size = getattr(self.engine.pool, "size", None)
+        count = min(count, pool_size()) if pool_size else 0
+        if count <= 0:
+            return 0
+        
+        # Hold every connection until all are open so the pool ends up with `count` distinct ones
+        with concurrent.futures.ThreadPoolExecutor(max_workers=count) as executor:
+            connections = list(executor.map(lambda _: self.engine.connect(), range(count)))
+        for connection in connections:
+            connection.close()
+        logger.info("Warmed %d pooled database connections", count)
+        return count
     
     @contextmanager
     def get_session(self):
@@ -49,74 +216,301 @@ class DatabaseManager:
             session.commit()
         except Exception as e:
             session.rollback()
-            logger.error(f"Database session error: {str(e)}")
+            logger.error("Database session error: %s", e)
             raise
         finally:
             session.close()
     
-    def execute_query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
-        """Execute SQL query and return results"""
-        with self.get_session() as session:
-            result = session.execute(text(query), params or {})
-            columns = result.keys()
-            return [dict(zip(columns, row)) for row in result.fetchall()]
+    @contextmanager
+    def get_connection(self):
+        """Context manager for a pooled Core connection inside one transaction, without ORM session overhead"""
+        if not self.engine:
+            self.connect()
+        
+        try:
+            with self.engine.begin() as connection:
+                yield connection
+        except Exception as e:
+            logger.error("Database connection error: %s", e)
+            raise
+    
+    @contextmanager
+    def get_read_connection(self):
+        """Context manager for a pooled Core connection used only for reads, so it is never committed"""
+        if not self.engine:
+            self.connect()
+        
+        try:
+            with self.engine.connect() as connection:
+                yield connection
+        except Exception as e:
+            logger.error("Database connection error: %s", e)
+            raise
     
-    def execute_non_query(self, query: str, params: Optional[Dict] = None) -> int:
+    @contextmanager
+    def raw_sqlite_cursor(self):
+        """
+        Context manager for a sqlite3 cursor on a pooled connection, bypassing SQLAlchemy's
+        compile and result layers. The connection is in autocommit mode, so each statement
+        commits on its own; the write-tracking hook does not see these statements.
+        """
+        if not self.engine:
+            self.connect()
+        
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.driver_connection.cursor()
+            try:
+                yield cursor
+            except Exception as e:
+                logger.error("Database connection error: %s", e)
+                raise
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+    
+    def _raw_sql(self, query: Union[str, Executable]) -> Optional[str]:
+        """SQL text of query if it can take the raw sqlite3 path: plain SQL strings with :name parameters"""
+        # text() and Core statements stay on SQLAlchemy so their bind types and write tracking apply
+        if self._use_raw_sqlite and isinstance(query, str):
+            return query
+        return None
+    
+    def execute_query(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> List[Dict]:
+        """Execute SQL query and return its rows as dicts of column name to value"""
+        sql = self._raw_sql(query)
+        if sql is not None:
+            with self.raw_sqlite_cursor() as cursor:
+                cursor.execute(sql, params or {})
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        with self.get_read_connection() as connection:
+            # Plain dicts like the raw sqlite3 path, so the row type does not depend on the dialect
+            return [dict(row) for row in connection.execute(_as_statement(query), params or {}).mappings()]
+    
+    def scalar(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> Any:
+        """Execute SQL query and return the first column of its first row, or None if there are no rows"""
+        sql = self._raw_sql(query)
+        if sql is not None:
+            with self.raw_sqlite_cursor() as cursor:
+                row = cursor.execute(sql, params or {}).fetchone()
+                return row[0] if row else None
+        with self.get_read_connection() as connection:
+            return connection.execute(_as_statement(query), params or {}).scalar()
+    
+    def execute_query_columns(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> Dict[str, tuple]:
+        """Execute SQL query and return results column-wise, without building a dict per row"""
+        with self.get_read_connection() as connection:
+            result = connection.execute(_as_statement(query), params or {})
+            columns = list(result.keys())
+            rows = result.fetchall()
+        if not rows:
+            return {column: () for column in columns}
+        return dict(zip(columns, zip(*rows)))
+    
+    def execute_non_query(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> int:
         """Execute non-query SQL statement and return affected rows"""
-        with self.get_session() as session:
-            result = session.execute(text(query), params or {})
+        sql = self._raw_sql(query)
+        if sql is not None:
+            self.note_writes(sql)
+            with self.raw_sqlite_cursor() as cursor:
+                return cursor.execute(sql, params or {}).rowcount
+        with self.get_connection() as connection:
+            result = connection.execute(_as_statement(query), params or {})
+            return result.rowcount
+    
+    def execute_many(self, query: Union[str, Executable], params: List[Dict]) -> int:
+        """Execute a statement for every parameter set in one executemany call and transaction"""
+        with self.get_connection() as connection:
+            result = connection.execute(_as_statement(query), params)
             return result.rowcount
     
+    def execute_script(self, script: str) -> None:
+        """Execute a multi-statement SQL script in a single transaction"""
+        if not self.engine:
+            self.connect()
+        
+        if self.engine.dialect.name == "sqlite":
+            # executescript runs the whole script in one call to the driver
+            self.note_writes(script)
+            connection = self.engine.raw_connection()
+            try:
+                connection.driver_connection.executescript(f"BEGIN;\n{script}\nCOMMIT;")
+            finally:
+                connection.close()
+            return
+        
+        with self.get_session() as session:
+            for statement in filter(None, (part.strip() for part in script.split(";"))):
+                session.execute(text(statement))
+    
+    def ping(self) -> bool:
+        """Check the database answers a trivial query on a pooled connection"""
+        if not self.engine:
+            self.connect()
+        with self.engine.connect() as connection:
+            return connection.exec_driver_sql("SELECT 1").scalar() == 1
+    
+    def quote_table(self, table_name: str) -> str:
+        """Quote table_name as an identifier so it can be interpolated into SQL safely"""
+        if not self.engine:
+            self.connect()
+        return self.engine.dialect.identifier_preparer.quote(table_name)
+    
     def table_exists(self, table_name: str) -> bool:
-        """Check if table exists in database"""
-        try:
-            with self.get_session() as session:
-                result = session.execute(text(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'"))
-                return result.fetchone() is not None
-        except Exception:
-            return False
+        """Check if table exists in database; cached until the next DDL statement"""
+        if table_name in self._exists_cache:
+            return self._exists_cache[table_name]
+        if not self.engine:
+            self.connect()
+        if self.engine.dialect.name != "sqlite":
+            exists = self._get_inspector().has_table(table_name)
+        else:
+            exists = self.scalar(TABLE_EXISTS_QUERY, {"name": table_name}) is not None
+        self._exists_cache[table_name] = exists
+        return exists
     
     def get_table_schema(self, table_name: str) -> List[Dict]:
-        """Get table schema information"""
+        """
+        Get table schema information as PRAGMA table_info rows; cached until the next DDL statement.
+        A missing table has no columns.
+        """
+        if table_name in self._schema_cache:
+            return list(self._schema_cache[table_name])
+        if not self.engine:
+            self.connect()
+        if self.engine.dialect.name != "sqlite":
+            schema = self._reflect_table_info(table_name)
+        else:
+            with self.get_read_connection() as connection:
+                schema = connection.execute(TABLE_INFO_QUERY, {"name": table_name}).mappings().all()
+        self._schema_cache[table_name] = tuple(schema)
+        return schema
+    
+    def _reflect_table_info(self, table_name: str) -> List[Dict]:
+        """Reflect a table through the inspector into the PRAGMA table_info row shape"""
+        inspector = self._get_inspector()
         try:
-            with self.get_session() as session:
-                result = session.execute(text(f"PRAGMA table_info({table_name})"))
-                columns = result.keys()
-                return [dict(zip(columns, row)) for row in result.fetchall()]
-        except Exception as e:
-            logger.error(f"Error getting table schema: {str(e)}")
+            columns = inspector.get_columns(table_name)
+        except NoSuchTableError:
             return []
+        primary_key = inspector.get_pk_constraint(table_name)["constrained_columns"]
+        return [
+            {
+                "cid": cid,
+                "name": column["name"],
+                "type": str(column["type"]),
+                "notnull": int(not column["nullable"]),
+                "dflt_value": column.get("default"),
+                "pk": primary_key.index(column["name"]) + 1 if column["name"] in primary_key else 0
+            }
+            for cid, column in enumerate(columns)
+        ]
     
     def get_table_count(self, table_name: str) -> int:
         """Get number of rows in table"""
-        try:
-            result = self.execute_query(f"SELECT COUNT(*) as count FROM {table_name}")
-            return result[0]['count'] if result else 0
-        except Exception:
-            return 0
+        return self.scalar(f"SELECT COUNT(*) FROM {self.quote_table(table_name)}")
+    
+    def is_empty(self, table_name: str) -> bool:
+        """Check whether a table has no rows, stopping at the first row found"""
+        return not self.scalar(f"SELECT EXISTS (SELECT 1 FROM {self.quote_table(table_name)})")
     
     def truncate_table(self, table_name: str) -> bool:
         """Truncate table (delete all rows)"""
         try:
-            self.execute_non_query(f"DELETE FROM {table_name}")
+            self.execute_non_query(f"DELETE FROM {self.quote_table(table_name)}")
             return True
         except Exception as e:
-            logger.error(f"Error truncating table {table_name}: {str(e)}")
+            logger.error("Error truncating table %s: %s", table_name, e)
             return False
     
+    def empty_tables_sql(self, table_names: List[str]) -> List[str]:
+        """
+        Statements that delete every row of the given tables: one TRUNCATE on PostgreSQL, which
+        skips the per-row work and is transactional there; a DELETE per table elsewhere (MySQL's
+        TRUNCATE commits implicitly and refuses tables referenced by a foreign key).
+        On PostgreSQL the id sequences restart so reseeded rows get the same ids. Tables that
+        reference the given ones are not emptied, so list them too, dependents first.
+        """
+        quoted = [self.quote_table(table_name) for table_name in table_names]
+        if self.engine.dialect.name == "postgresql":
+            return [f"TRUNCATE {', '.join(quoted)} RESTART IDENTITY"]
+        return [f"DELETE FROM {table_name}" for table_name in quoted]
+    
     def drop_table(self, table_name: str) -> bool:
         """Drop table if exists"""
         try:
-            self.execute_non_query(f"DROP TABLE IF EXISTS {table_name}")
+            self.execute_non_query(f"DROP TABLE IF EXISTS {self.quote_table(table_name)}")
             return True
         except Exception as e:
-            logger.error(f"Error dropping table {table_name}: {str(e)}")
+            logger.error("Error dropping table %s: %s", table_name, e)
+            return False
+    
+    def snapshot(self) -> bool:
+        """Copy the current SQLite database into an in-memory snapshot; returns False on other backends"""
+        if not self.engine:
+            self.connect()
+        if self.engine.dialect.name != "sqlite":
+            return False
+        
+        snapshot = sqlite3.connect(":memory:", check_same_thread=False)
+        connection = self.engine.raw_connection()
+        try:
+            connection.driver_connection.backup(snapshot)
+        finally:
+            connection.close()
+        self.discard_snapshot()
+        self._snapshot = snapshot
+        return True
+    
+    def restore_snapshot(self, table_names: List[str]) -> bool:
+        """
+        Replace the rows of the given tables, listed in dependency-safe deletion order, with their
+        snapshot contents in one transaction. Other tables and the schema are left alone, so tables
+        a scenario created are untouched. Returns False if there is no snapshot.
+        """
+        if self._snapshot is None:
             return False
+        if not self.engine:
+            self.connect()
+        
+        quote = self.engine.dialect.identifier_preparer.quote
+        contents = []
+        for table_name in table_names:
+            # table_info leaves out generated columns, which cannot be inserted
+            columns = [quote(row[1]) for row in self._snapshot.execute(TABLE_INFO_QUERY.text, {"name": table_name})]
+            rows = self._snapshot.execute(f"SELECT {', '.join(columns)} FROM {quote(table_name)}").fetchall()
+            contents.append((quote(table_name), columns, rows))
+        
+        with self.get_connection() as connection:
+            for table_name, _, _ in contents:
+                connection.exec_driver_sql(f"DELETE FROM {table_name}")
+            for table_name, columns, rows in reversed(contents):
+                if rows:
+                    placeholders = ", ".join("?" * len(columns))
+                    connection.exec_driver_sql(
+                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", rows
+                    )
+        return True
+    
+    def discard_snapshot(self):
+        """Release the in-memory snapshot"""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
     
     def close(self):
         """Close database connection"""
+        self.invalidate_schema_cache()
         if self.engine:
+            self.scoped_session.remove()
             self.engine.dispose()
+            self.engine = None
+            self._inspector = None
+            self._use_raw_sqlite = False
+            self.session_factory = None
+            self.scoped_session = None
             logger.info("Database connection closed")
 
 # Sample table models
@@ -150,9 +544,108 @@ class Order(Base):
     order_date = Column(DateTime, default=datetime.utcnow)
     status = Column(String(20), default='pending')
 
-# Global database manager instance
+    __table_args__ = (
+        # Covers the per-user order aggregation so it never touches the table rows
+        Index('ix_orders_user_total', 'user_id', 'total_amount'),
+        # Returns a user's order history already sorted newest first
+        Index('ix_orders_user_date', user_id, order_date.desc()),
+    )
+
+class UserOrderStats(Base):
+    """Per-user order totals, kept current by the ORDER_STATS_TRIGGERS on orders"""
+    __tablename__ = 'user_order_stats'
+    
+    user_id = Column(Integer, primary_key=True)
+    order_count = Column(Integer, nullable=False)
+    total_spent = Column(Float, nullable=False)
+    avg_order_value = Column(Float, nullable=False)
+
+# Recompute the stats row of one user from the covering ix_orders_user_total index;
+# GROUP BY yields no row once the user has no orders left, so the row disappears
+_RECOMPUTE_ORDER_STATS = """
+        DELETE FROM user_order_stats WHERE user_id = {ref}.user_id;
+        INSERT INTO user_order_stats (user_id, order_count, total_spent, avg_order_value)
+        SELECT user_id, COUNT(*), SUM(total_amount), AVG(total_amount)
+        FROM orders WHERE user_id = {ref}.user_id GROUP BY user_id;"""
+
+ORDER_STATS_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS orders_stats_insert AFTER INSERT ON orders BEGIN"
+    f"{_RECOMPUTE_ORDER_STATS.format(ref='NEW')}\n    END",
+    f"CREATE TRIGGER IF NOT EXISTS orders_stats_delete AFTER DELETE ON orders BEGIN"
+    f"{_RECOMPUTE_ORDER_STATS.format(ref='OLD')}\n    END",
+    f"CREATE TRIGGER IF NOT EXISTS orders_stats_update AFTER UPDATE OF user_id, total_amount ON orders BEGIN"
+    f"{_RECOMPUTE_ORDER_STATS.format(ref='OLD')}{_RECOMPUTE_ORDER_STATS.format(ref='NEW')}\n    END"
+]
+
+BACKFILL_ORDER_STATS = """
+    INSERT OR REPLACE INTO user_order_stats (user_id, order_count, total_spent, avg_order_value)
+    SELECT user_id, COUNT(*), SUM(total_amount), AVG(total_amount) FROM orders GROUP BY user_id
+"""
+
+for _trigger in ORDER_STATS_TRIGGERS:
+    event.listen(Order.__table__, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
+
+# Indexed domain part of users.email so domain searches avoid a leading-wildcard LIKE scan.
+# Generated column syntax differs per dialect, so the column is added by _add_email_domain_column
+# rather than declared on User; PostgreSQL only supports stored generated columns.
+EMAIL_DOMAIN_COLUMNS = {
+    "sqlite": "GENERATED ALWAYS AS (substr(email, instr(email, '@') + 1)) VIRTUAL",
+    "mysql": "GENERATED ALWAYS AS (substring_index(email, '@', -1)) VIRTUAL",
+    "postgresql": "GENERATED ALWAYS AS (split_part(email, '@', 2)) STORED"
+}
+
+# Sample tables in dependency-safe deletion order
+SAMPLE_TABLES = ["orders", "users", "products"]
+
+# Sample tables whose rows reference each sample table
+SAMPLE_TABLE_DEPENDENTS = {
+    "users": {"orders"},
+    "products": {"orders"}
+}
+
+# Global database manager instance; it connects on first use, so importing utils
+# opens no database connection
 db_manager = DatabaseManager()
 
+# Engine whose schema _upgrade_existing_schema last brought up to date
+_upgraded_engine = None
+
+def _upgrade_existing_schema():
+    """
+    Bring tables created by an older version of the models up to date and add email_domain,
+    once per engine: a reconnected in-memory database starts from a fresh schema.
+    """
+    global _upgraded_engine
+    if _upgraded_engine is db_manager.engine:
+        return
+    if db_manager.engine.dialect.name in EMAIL_DOMAIN_COLUMNS:
+        _add_email_domain_column()
+    if db_manager.engine.dialect.name == "sqlite":
+        _add_order_stats_triggers()
+    # create_all() only builds indexes together with their table
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db_manager.engine, checkfirst=True)
+    _upgraded_engine = db_manager.engine
+
+def _add_email_domain_column():
+    """Add the indexed email_domain generated column to the users table if it is missing"""
+    with db_manager.get_connection() as connection:
+        columns = {column["name"] for column in inspect(connection).get_columns("users")}
+        if "email_domain" not in columns:
+            connection.exec_driver_sql(
+                f"ALTER TABLE users ADD COLUMN email_domain VARCHAR(100) {EMAIL_DOMAIN_COLUMNS[connection.dialect.name]}"
+            )
+            connection.exec_driver_sql("CREATE INDEX ix_users_email_domain ON users (email_domain)")
+            logger.info("Added email_domain column to users table")
+
+def _add_order_stats_triggers():
+    """Install the user_order_stats triggers on an existing orders table and fill in its rows"""
+    with db_manager.get_connection() as connection:
+        for trigger in ORDER_STATS_TRIGGERS:
+            connection.exec_driver_sql(trigger)
+        connection.exec_driver_sql(BACKFILL_ORDER_STATS)
+
 def init_test_database():
     """Initialize test database with sample tables"""
     if not db_manager.connect():
@@ -160,48 +653,93 @@ def init_test_database():
     
     # Create all tables
     Base.metadata.create_all(db_manager.engine)
+    _upgrade_existing_schema()
     logger.info("Test database initialized successfully")
 
 def cleanup_test_database():
     """Clean up test database"""
     try:
         Base.metadata.drop_all(db_manager.engine)
+        db_manager.discard_snapshot()
         db_manager.close()
         logger.info("Test database cleaned up successfully")
     except Exception as e:
-        logger.error(f"Error cleaning up database: {str(e)}")
+        logger.error("Error cleaning up database: %s", e)
+
+# Sample rows loaded by insert_test_data/reset_test_data
+SAMPLE_USERS = [
+    {"username": "john_doe", "email": "john@example.com"},
+    {"username": "jane_smith", "email": "jane@example.com"},
+    {"username": "bob_wilson", "email": "bob@example.com"}
+]
+
+SAMPLE_PRODUCTS = [
+    {"name": "Laptop", "price": 999.99, "category": "Electronics", "in_stock": 10},
+    {"name": "Mouse", "price": 25.99, "category": "Electronics", "in_stock": 50},
+    {"name": "Book", "price": 12.99, "category": "Books", "in_stock": 30}
+]
+
+SAMPLE_ORDERS = [
+    {"user_id": 1, "product_id": 1, "quantity": 1, "total_amount": 999.99},
+    {"user_id": 2, "product_id": 2, "quantity": 2, "total_amount": 51.98},
+    {"user_id": 3, "product_id": 3, "quantity": 3, "total_amount": 38.97}
+]
+
+# Model and sample rows for each sample table
+SAMPLE_DATA = {
+    "users": (User, SAMPLE_USERS),
+    "products": (Product, SAMPLE_PRODUCTS),
+    "orders": (Order, SAMPLE_ORDERS)
+}
+
+def _add_test_data(connection, tables=SAMPLE_TABLES):
+    """Bulk insert the sample rows of the given tables through an open connection"""
+    # One Core executemany per table; no ORM bulk-persistence layer in between
+    for table_name in ("users", "products", "orders"):
+        if table_name in tables:
+            model, rows = SAMPLE_DATA[table_name]
+            connection.execute(model.__table__.insert(), rows)
 
 def insert_test_data():
     """Insert sample test data"""
     try:
-        with db_manager.get_session() as session:
-            # Insert sample users
-            users = [
-                User(username="john_doe", email="john@example.com"),
-                User(username="jane_smith", email="jane@example.com"),
-                User(username="bob_wilson", email="bob@example.com")
-            ]
-            session.add_all(users)
-            session.flush()
-            
-            # Insert sample products
-            products = [
-                Product(name="Laptop", price=999.99, category="Electronics", in_stock=10),
-                Product(name="Mouse", price=25.99, category="Electronics", in_stock=50),
-                Product(name="Book", price=12.99, category="Books", in_stock=30)
-            ]
-            session.add_all(products)
-            session.flush()
-            
-            # Insert sample orders
-            orders = [
-                Order(user_id=1, product_id=1, quantity=1, total_amount=999.99),
-                Order(user_id=2, product_id=2, quantity=2, total_amount=51.98),
-                Order(user_id=3, product_id=3, quantity=3, total_amount=38.97)
-            ]
-            session.add_all(orders)
+        with db_manager.get_connection() as connection:
+            _add_test_data(connection)
             
         logger.info("Test data inserted successfully")
     except Exception as e:
-        logger.error(f"Error inserting test data: {str(e)}")
-        raise 
\ No newline at end of file
+        logger.error("Error inserting test data: %s", e)
+        raise
+
+def reset_test_data(tables=SAMPLE_TABLES):
+    """
+    Replace the contents of the given sample tables with fresh test data in one transaction.
+    Sample tables that reference a given table are reset along with it.
+    """
+    needed = set(tables)
+    for table_name in tables:
+        needed.update(SAMPLE_TABLE_DEPENDENTS.get(table_name, ()))
+    emptied = [table_name for table_name in SAMPLE_TABLES if table_name in needed]
+    try:
+        with db_manager.get_connection() as connection:
+            for statement in db_manager.empty_tables_sql(emptied):
+                connection.execute(text(statement))
+            _add_test_data(connection, emptied)
+            
+        logger.info("Test data reset successfully")
+    except Exception as e:
+        logger.error("Error resetting test data: %s", e)
+        raise
+
+def snapshot_test_data():
+    """Seed the sample tables and snapshot the result so later resets can restore it directly"""
+    reset_test_data()
+    if db_manager.snapshot():
+        logger.info("Test data snapshot taken")
+
+def restore_test_data(tables=SAMPLE_TABLES):
+    """Restore the given tables from the seeded snapshot, falling back to reseeding them"""
+    if db_manager.restore_snapshot([table_name for table_name in SAMPLE_TABLES if table_name in tables]):
+        logger.info("Test data restored from snapshot")
+    else:
+        reset_test_data(tables)